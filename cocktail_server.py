@@ -1,12 +1,12 @@
 from fastmcp import FastMCP
-from services.rag_service import run_cocktail_rag
+from services.rag_service import run_cocktail_rag_async
 
 mcp = FastMCP("Demo 🚀")
 
 @mcp.tool
-def rag_cocktails(query: str):
+async def rag_cocktails(query: str):
     """Retrieve cocktail recommendations based on a query."""
-    return run_cocktail_rag(query=query)
+    return await run_cocktail_rag_async(query=query)
 
 if __name__ == "__main__":
     mcp.run(transport="stdio")
\ No newline at end of file
@@ -1,5 +1,7 @@
+import atexit
 import logging
 import logging.handlers
+import queue
 from pathlib import Path
 
 # Create logs directory if it doesn't exist
@@ -36,7 +38,14 @@ console_handler = logging.StreamHandler()
 console_handler.setLevel(logging.INFO)
 console_handler.setFormatter(simple_formatter)
 
-# Add handlers to logger
+# Route records through a queue so logger.* calls on request threads are a
+# non-blocking enqueue; the listener thread does the disk/console writes
 if not logger.handlers:
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
\ No newline at end of file
+    _log_queue = queue.Queue(-1)
+    logger.addHandler(logging.handlers.QueueHandler(_log_queue))
+
+    _listener = logging.handlers.QueueListener(
+        _log_queue, file_handler, console_handler, respect_handler_level=True
+    )
+    _listener.start()
+    atexit.register(_listener.stop)
\ No newline at end of file
@@ -0,0 +1,72 @@
+from dataclasses import dataclass
+import functools
+import os
+
+import dotenv
+
+from config.logger import logger
+
+@functools.lru_cache(maxsize=1)
+def load_env_once() -> bool:
+    """Loads .env into the environment, parsing the file at most once per process.
+
+    Every service module used to call dotenv.load_dotenv() at import, so
+    the .env file was parsed once per module; routing those calls here
+    makes the repeats no-ops.
+    """
+    return dotenv.load_dotenv()
+
+
+load_env_once()
+
+OLLAMA_HOST_ENV_VAR = "OLLAMA_HOST"
+DEFAULT_OLLAMA_HOST = "http://localhost:11434"
+EMBED_BATCH_SIZE_ENV_VAR = "OLLAMA_EMBED_BATCH_SIZE"
+DEFAULT_EMBED_BATCH_SIZE = 32
+# Concurrent in-flight embedding requests; the Ollama server side is governed
+# by OLLAMA_NUM_PARALLEL, so there is no benefit in going far beyond it
+EMBED_CONCURRENCY_ENV_VAR = "OLLAMA_EMBED_CONCURRENCY"
+DEFAULT_EMBED_CONCURRENCY = 10
+PINECONE_TRANSPORT_ENV_VAR = "PINECONE_TRANSPORT"
+DEFAULT_PINECONE_TRANSPORT = "rest"
+
+
+def _int_env(name: str, default: int) -> int:
+    """Read a positive integer environment variable, falling back to the default."""
+    raw_value = os.getenv(name)
+    if not raw_value:
+        return default
+    try:
+        value = int(raw_value)
+    except ValueError:
+        logger.warning(f"Invalid {name} value '{raw_value}'. Using default of {default}")
+        return default
+    if value <= 0:
+        logger.warning(f"Invalid {name} value {value}. Using default of {default}")
+        return default
+    return value
+
+
+@dataclass(frozen=True, slots=True)
+class Settings:
+    """Process-wide tuning knobs, resolved from the environment once."""
+
+    ollama_host: str
+    embed_batch_size: int
+    embed_concurrency: int
+    pinecone_transport: str
+
+
+@functools.lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Returns the cached Settings, reading and validating the environment on first use.
+
+    Values that must stay overridable per operation (EMBEDDING_MODEL, DATA_PATH,
+    Pinecone credentials) are deliberately not cached here.
+    """
+    return Settings(
+        ollama_host=os.getenv(OLLAMA_HOST_ENV_VAR, DEFAULT_OLLAMA_HOST),
+        embed_batch_size=_int_env(EMBED_BATCH_SIZE_ENV_VAR, DEFAULT_EMBED_BATCH_SIZE),
+        embed_concurrency=_int_env(EMBED_CONCURRENCY_ENV_VAR, DEFAULT_EMBED_CONCURRENCY),
+        pinecone_transport=os.getenv(PINECONE_TRANSPORT_ENV_VAR, DEFAULT_PINECONE_TRANSPORT).lower(),
+    )
@@ -1,7 +1,7 @@
-from dataclasses import dataclass
-from typing import List
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
 
-@dataclass
+@dataclass(slots=True)
 class Cocktail:
     """Represents a cocktail recipe with ingredients and preparation instructions."""
     
@@ -11,4 +11,17 @@ class Cocktail:
     tags: List[str]  # Descriptive tags (e.g., ["sweet", "fruity", "strong"])
     instructions: str  # Step-by-step preparation instructions
     image_url: str  # URL to cocktail image
-    ingredients: List[str]  # List of ingredients with measurements
\ No newline at end of file
+    ingredients: List[str]  # List of ingredients with measurements
+    # Vector-store metadata cached by the upsert path on first build
+    vector_metadata: Optional[Dict] = field(default=None, compare=False, repr=False)
+
+    def embedding_text(self) -> str:
+        """Compact canonical text used as embedding input.
+
+        Much shorter than repr(), so the embedding model processes fewer
+        tokens per cocktail; noise fields like the image URL are left out.
+        """
+        return (
+            f"{self.name} | {self.category} | {', '.join(map(str, self.tags))}"
+            f" | ingredients: {', '.join(map(str, self.ingredients))} | {self.instructions}"
+        )
\ No newline at end of file
@@ -1,6 +1,7 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Dict, Optional
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Ingredient:
     """Represents an ingredient that can be used in cocktail recipes."""
     
@@ -9,4 +10,15 @@ class Ingredient:
     description: str  # Detailed description of the ingredient
     alcohol: bool  # Whether the ingredient contains alcohol
     type: str  # Category of ingredient (e.g., "Spirit", "Mixer", "Garnish")
-    image_url: str  # URL to ingredient image
\ No newline at end of file
+    image_url: str  # URL to ingredient image
+    # Vector-store metadata cached by the upsert path on first build
+    vector_metadata: Optional[Dict] = field(default=None, compare=False, repr=False)
+
+    def embedding_text(self) -> str:
+        """Compact canonical text used as embedding input.
+
+        Much shorter than repr(), so the embedding model processes fewer
+        tokens per ingredient; the image URL is left out as noise.
+        """
+        alcohol_label = "alcoholic" if self.alcohol else "non-alcoholic"
+        return f"{self.name} | {self.type} | {alcohol_label} | {self.description}"
\ No newline at end of file
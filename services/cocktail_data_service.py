@@ -1,107 +1,236 @@
-import dotenv
 import os
-import json
+import pickle
 
+import blake3
+import ijson
+
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from config.logger import logger
+from config.settings import load_env_once
 from models.cocktail import Cocktail
 from models.ingredient import Ingredient
 
-dotenv.load_dotenv()
+load_env_once()
+
+# Opt-in on-disk cache of parsed Cocktail objects, keyed by the content hash
+# of the data file. Off unless the directory is configured, so tests that
+# patch load_cocktail_data keep full control of what create_cocktails sees.
+COCKTAIL_CACHE_DIR_ENV_VAR = "COCKTAIL_CACHE_DIR"
+
+def _resolve_data_path() -> str:
+    """Resolves and validates the cocktail data file path from the environment."""
+    # .env.example documents the lowercase key; accept both spellings
+    data_path = os.getenv("DATA_PATH") or os.getenv("data_path")
 
-def load_cocktail_data():
-    data_path = os.getenv("DATA_PATH")
-    
     # Handle missing environment variable
     if not data_path:
         raise ValueError("data_path environment variable is not set")
-    
+
     # Handle file not found
     if not os.path.exists(data_path):
         raise FileNotFoundError(f"Data file not found at path: {data_path}")
-    
+
+    return data_path
+
+def _open_data_file(data_path: str) -> BinaryIO:
+    """Opens the data file for sequential scanning with a large read buffer.
+
+    The fadvise hint lets the kernel read ahead aggressively, and the 1 MiB
+    buffer keeps the ijson parser fed with few read syscalls.
+    """
+    f = open(data_path, 'rb', buffering=1 << 20)
     try:
-        with open(data_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-    except json.JSONDecodeError as e:
+        os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+    except (AttributeError, OSError):
+        # Not available on this platform; plain buffered reads still work
+        pass
+    return f
+
+def _iter_cocktail_rows(data_path: str) -> Iterator[dict]:
+    """Yields cocktail rows one at a time without materializing the whole file."""
+    try:
+        with _open_data_file(data_path) as f:
+            yield from ijson.items(f, 'item')
+    except ijson.JSONError as e:
         raise ValueError(f"Invalid JSON in data file: {e}")
     except Exception as e:
         raise RuntimeError(f"Error reading data file: {e}")
-    
+
+def load_cocktail_data() -> Iterator[dict]:
+    """Returns an iterator over the cocktail rows in the data file.
+
+    Rows are stream-parsed one at a time, so resident memory stays flat
+    instead of growing with the file size. Callers that need a list can
+    wrap the result in list().
+    """
+    data_path = _resolve_data_path()
+
+    # Sniff the first token so a non-array file fails here rather than
+    # midway through iteration
+    try:
+        with _open_data_file(data_path) as f:
+            first_event = next(ijson.parse(f), None)
+    except ijson.JSONError as e:
+        raise ValueError(f"Invalid JSON in data file: {e}")
+    except Exception as e:
+        raise RuntimeError(f"Error reading data file: {e}")
+
     # Handle empty or invalid data
-    if not isinstance(data, list):
+    if first_event is None or first_event[1] != 'start_array':
         raise ValueError("Data file must contain a list of cocktails")
-    
-    return data
 
-# function to create cocktail objects from data file
-def create_cocktails():
-    """Creates and returns a list of Cocktail objects from the data file."""
-    # read cocktails from file
-    data = load_cocktail_data()
+    return _iter_cocktail_rows(data_path)
 
-    # prepare list for cocktails
-    cocktail_list = []
+def _build_cocktail(row: Any) -> Optional[Cocktail]:
+    """Builds a Cocktail from a data row, or returns None for invalid rows."""
+    # Skip invalid rows
+    if not isinstance(row, dict) or 'id' not in row or 'name' not in row:
+        return None
 
-    # create cocktail objects from data rows
-    for row in data:
-        # Skip invalid rows
-        if not isinstance(row, dict) or 'id' not in row or 'name' not in row:
+    # Handle missing ingredients
+    ingredients_data = row.get('ingredients', [])
+    ingredient_names = []
+
+    if isinstance(ingredients_data, list):
+        # One dict lookup per ingredient instead of two (filter + value)
+        ingredient_names = [name for ingredient in ingredients_data
+                            if isinstance(ingredient, dict) and (name := ingredient.get('name'))]
+
+    # Positional construction skips the per-call kwargs dict; field order
+    # matches the Cocktail dataclass definition
+    return Cocktail(
+        row['id'],
+        row['name'],
+        row.get('category', ''),
+        row.get('tags', []),
+        row.get('instructions', ''),
+        row.get('imageUrl', ''),
+        ingredient_names
+    )
+
+def _collect_ingredients(row: Any, ingredients: Dict[int, Ingredient]) -> None:
+    """Adds the ingredients of a data row to the given id-keyed dict, skipping invalid entries."""
+    # Skip invalid rows
+    if not isinstance(row, dict) or 'ingredients' not in row:
+        return
+
+    ingredients_data = row['ingredients']
+    if not isinstance(ingredients_data, list):
+        return
+
+    # create ingredient objects from cocktail ingredients
+    for ingredient_data in ingredients_data:
+        # Skip invalid ingredient data
+        if not isinstance(ingredient_data, dict) or 'id' not in ingredient_data or 'name' not in ingredient_data:
+            continue
+
+        # Duplicates across cocktails are common; skip before constructing
+        ingredient_id = ingredient_data['id']
+        if ingredient_id in ingredients:
             continue
-            
-        # Handle missing ingredients
-        ingredients_data = row.get('ingredients', [])
-        ingredient_names = []
-        
-        if isinstance(ingredients_data, list):
-            ingredient_names = [ingredient.get('name', '') for ingredient in ingredients_data 
-                             if isinstance(ingredient, dict) and ingredient.get('name')]
-
-        cocktail = Cocktail(
-            id=row['id'],
-            name=row['name'],
-            category=row.get('category', ''),
-            tags=row.get('tags', []),
-            instructions=row.get('instructions', ''),
-            image_url=row.get('imageUrl', ''),
-            ingredients=ingredient_names
+
+        ingredients[ingredient_id] = Ingredient(
+            id=ingredient_id,
+            name=ingredient_data['name'],
+            description=ingredient_data.get('description', ''),
+            alcohol=ingredient_data.get('alcoholic', False),
+            type=ingredient_data.get('type', ''),
+            image_url=ingredient_data.get('imageUrl', '')
         )
 
-        cocktail_list.append(cocktail)
+def _cocktail_cache_file() -> Optional[str]:
+    """Returns the cache file path for the current data file, or None when caching is off."""
+    cache_dir = os.getenv(COCKTAIL_CACHE_DIR_ENV_VAR)
+    if not cache_dir:
+        return None
+
+    try:
+        with open(_resolve_data_path(), 'rb') as f:
+            digest = blake3.blake3(f.read()).hexdigest()
+    except Exception as e:
+        logger.warning("Cocktail cache unavailable: %s", e)
+        return None
+
+    return os.path.join(cache_dir, f"{digest}.pkl")
+
+def _load_cached_cocktails(cache_file: str) -> Optional[List[Cocktail]]:
+    """Loads pickled cocktails for a content hash, or None on miss/corruption."""
+    if not os.path.exists(cache_file):
+        return None
+    try:
+        with open(cache_file, 'rb') as f:
+            return pickle.load(f)
+    except Exception as e:
+        logger.warning("Cocktail cache read failed: %s", e)
+        return None
+
+def _store_cached_cocktails(cache_file: str, cocktails: List[Cocktail]) -> None:
+    """Stores parsed cocktails on disk. Cache failures only log; they never break parsing."""
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        with open(cache_file, 'wb') as f:
+            pickle.dump(cocktails, f, protocol=5)
+    except Exception as e:
+        logger.warning("Cocktail cache write failed: %s", e)
+
+# function to create cocktail objects from data file
+def create_cocktails() -> List[Cocktail]:
+    """Creates and returns a list of Cocktail objects from the data file.
+
+    When COCKTAIL_CACHE_DIR is set, parsed cocktails are pickled per content
+    hash of the data file, so repeat runs skip the JSON parse and object
+    construction entirely.
+    """
+    cache_file = _cocktail_cache_file()
+    if cache_file is not None:
+        cached = _load_cached_cocktails(cache_file)
+        if cached is not None:
+            return cached
+
+    # read cocktails from file
+    data = load_cocktail_data()
+
+    # create cocktail objects from data rows; map() drives _build_cocktail
+    # from C instead of a Python-level append loop
+    cocktail_list = [cocktail for cocktail in map(_build_cocktail, data) if cocktail is not None]
+
+    if cache_file is not None:
+        _store_cached_cocktails(cache_file, cocktail_list)
 
     return cocktail_list
 
-def create_ingredients():
+def create_ingredients() -> List[Ingredient]:
     """Creates and returns a list of unique ingredient names from the cocktail data."""
     # read cocktails from file
     data = load_cocktail_data()
 
-    # prepare set for ingredients
-    ingredients: set[Ingredient] = set()
+    # prepare id-keyed dict for ingredient dedup
+    ingredients: Dict[int, Ingredient] = {}
 
     # create ingredient objects from data rows
     for row in data:
-        # Skip invalid rows
-        if not isinstance(row, dict) or 'ingredients' not in row:
-            continue
-            
-        ingredients_data = row['ingredients']
-        if not isinstance(ingredients_data, list):
-            continue
-            
-        # create ingredient objects from cocktail ingredients
-        for ingredient_data in ingredients_data:
-            # Skip invalid ingredient data
-            if not isinstance(ingredient_data, dict) or 'id' not in ingredient_data or 'name' not in ingredient_data:
-                continue
-                
-            ingredient = Ingredient(
-                id=ingredient_data['id'],
-                name=ingredient_data['name'],
-                description=ingredient_data.get('description', ''),
-                alcohol=ingredient_data.get('alcoholic', False),
-                type=ingredient_data.get('type', ''),
-                image_url=ingredient_data.get('imageUrl', '')
-            )
-            ingredients.add(ingredient)
-        
-
-    return ingredients
\ No newline at end of file
+        _collect_ingredients(row, ingredients)
+
+    # The id-keyed dict doubles as an ordered set, so this is an O(n)
+    # insertion-ordered dedup
+    return list(ingredients.values())
+
+def create_cocktails_and_ingredients() -> Tuple[List[Cocktail], List[Ingredient]]:
+    """Creates cocktails and unique ingredients in a single pass over the data file.
+
+    Parses the data file once instead of the two full parses that calling
+    create_cocktails() and create_ingredients() back-to-back would cost.
+    """
+    data = load_cocktail_data()
+
+    cocktail_list: List[Cocktail] = []
+    ingredients: Dict[int, Ingredient] = {}
+
+    for row in data:
+        cocktail = _build_cocktail(row)
+        if cocktail is not None:
+            cocktail_list.append(cocktail)
+        _collect_ingredients(row, ingredients)
+
+    return cocktail_list, list(ingredients.values())
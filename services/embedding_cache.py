@@ -0,0 +1,120 @@
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import blake3
+import numpy as np
+
+from config.logger import logger
+
+# Cache location and kill-switch are resolved per call so tests can redirect them
+EMBEDDING_CACHE_PATH_ENV_VAR = "EMBEDDING_CACHE_PATH"
+EMBEDDING_CACHE_DISABLED_ENV_VAR = "EMBEDDING_CACHE_DISABLED"
+DEFAULT_CACHE_PATH = Path(__file__).parent.parent / ".embedding_cache" / "embeddings.db"
+
+_connections: Dict[str, sqlite3.Connection] = {}
+_lock = threading.Lock()
+
+
+def cache_key(model: str, text: str) -> str:
+    """Content-addressed key for one (model, text) pair."""
+    return blake3.blake3(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+
+def _is_disabled() -> bool:
+    """Whether the cache has been switched off via environment variable."""
+    return os.getenv(EMBEDDING_CACHE_DISABLED_ENV_VAR) == "1"
+
+
+def _get_connection() -> Optional[sqlite3.Connection]:
+    """Returns the sqlite connection for the configured cache path, or None when unavailable."""
+    if _is_disabled():
+        return None
+
+    path = os.getenv(EMBEDDING_CACHE_PATH_ENV_VAR) or str(DEFAULT_CACHE_PATH)
+
+    with _lock:
+        connection = _connections.get(path)
+        if connection is not None:
+            return connection
+
+        try:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(path, check_same_thread=False)
+            # Vectors are stored int8-quantized with a per-vector scale; drop
+            # any pre-quantization table so stale float32 rows are not misread
+            columns = {row[1] for row in connection.execute("PRAGMA table_info(embeddings)")}
+            if columns and "scale" not in columns:
+                connection.execute("DROP TABLE embeddings")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, scale REAL NOT NULL, vector BLOB NOT NULL)"
+            )
+            connection.commit()
+        except Exception as e:
+            logger.warning(f"Embedding cache unavailable at {path}: {e}")
+            return None
+
+        _connections[path] = connection
+        return connection
+
+
+def _quantize(vector) -> tuple:
+    """Symmetric int8 quantization; returns (scale, int8 bytes)."""
+    values = np.asarray(vector, dtype=np.float32)
+    scale = float(np.abs(values).max()) / 127.0 if values.size else 0.0
+    if scale == 0.0:
+        quantized = np.zeros(values.shape, dtype=np.int8)
+    else:
+        quantized = np.clip(np.round(values / scale), -127, 127).astype(np.int8)
+    return scale, quantized.tobytes()
+
+
+def _dequantize(scale: float, blob: bytes) -> List[float]:
+    """Reconstructs the float vector from a quantized cache row."""
+    return (np.frombuffer(blob, dtype=np.int8).astype(np.float32) * scale).tolist()
+
+
+def get_many(model: str, texts: List[str]) -> Dict[int, List[float]]:
+    """Returns cached vectors keyed by position in the texts list."""
+    connection = _get_connection()
+    if connection is None or not texts:
+        return {}
+
+    hits: Dict[int, List[float]] = {}
+    try:
+        with _lock:
+            for position, text in enumerate(texts):
+                row = connection.execute(
+                    "SELECT scale, vector FROM embeddings WHERE key = ?",
+                    (cache_key(model, text),)
+                ).fetchone()
+                if row is not None:
+                    hits[position] = _dequantize(row[0], row[1])
+    except Exception as e:
+        logger.warning(f"Embedding cache read failed: {e}")
+        return {}
+
+    return hits
+
+
+def put_many(model: str, texts: List[str], vectors: List[List[float]]) -> None:
+    """Stores vectors for the given texts. Cache failures only log; they never break embedding."""
+    connection = _get_connection()
+    if connection is None or not texts:
+        return
+
+    try:
+        rows = [
+            (cache_key(model, text), *_quantize(vector))
+            for text, vector in zip(texts, vectors)
+        ]
+        with _lock:
+            connection.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, scale, vector) VALUES (?, ?, ?)",
+                rows
+            )
+            connection.commit()
+    except Exception as e:
+        logger.warning(f"Embedding cache write failed: {e}")
@@ -1,30 +1,146 @@
 from typing import Dict, List
+import asyncio
+import functools
+import httpx
 import ollama
 import os
-import dotenv
+import numpy as np
 from models.cocktail import Cocktail
 from models.ingredient import Ingredient
 from config.logger import logger
+from config.settings import get_settings, load_env_once
+from services import embedding_cache
 
-dotenv.load_dotenv()
+load_env_once()
 
 # Constants
 EMBEDDING_MODEL_ENV_VAR = "EMBEDDING_MODEL"
 
+@functools.lru_cache(maxsize=1)
 def _get_embedding_model() -> str:
-    """Get embedding model from environment variable."""
+    """Get embedding model from environment variable.
+
+    Memoized so embedding loops don't re-read os.environ per call; tests
+    that change the env clear the cache via the conftest reset fixture.
+    """
     model = os.getenv(EMBEDDING_MODEL_ENV_VAR)
     if not model:
         raise ValueError(f"{EMBEDDING_MODEL_ENV_VAR} environment variable is not set")
     return model
 
+def _parse_batch_response(embedding_response, expected_count: int) -> np.ndarray:
+    """Validate a batch embedding response and convert it to a float32 matrix."""
+    embeddings = embedding_response.embeddings
+    if not embeddings or len(embeddings) != expected_count:
+        raise ValueError(f"Expected {expected_count} embeddings, got {len(embeddings) if embeddings else 0}")
+    # Convert all values in one pass instead of per-element float() calls
+    return np.asarray(embeddings, dtype=np.float32)
+
+async def _embed_batch_async(client: ollama.AsyncClient, semaphore: asyncio.Semaphore,
+                             model: str, input_texts: List[str]) -> List[List[float]]:
+    """Embed a single batch through the async client, bounded by the semaphore."""
+    async with semaphore:
+        embedding_response = await client.embed(model=model, input=input_texts)
+    return _parse_batch_response(embedding_response, len(input_texts))
+
+def _make_async_client() -> ollama.AsyncClient:
+    """Async Ollama client with a persistent keep-alive connection pool.
+
+    Ollama serves HTTP/1.1, so the win here is connection reuse across the
+    burst of concurrent batch requests rather than HTTP/2 multiplexing.
+    """
+    return ollama.AsyncClient(
+        host=get_settings().ollama_host,
+        limits=httpx.Limits(max_keepalive_connections=40, max_connections=100, keepalive_expiry=30.0),
+        timeout=httpx.Timeout(300.0, connect=10.0),
+    )
+
+async def _embed_many_async(model: str, batches: List[List[str]], concurrency: int) -> List:
+    """Embeds batches of texts concurrently against the Ollama server.
+
+    Returns one entry per batch: either a list of embeddings or the exception
+    that batch raised, so the caller can fall back per item.
+    """
+    client = _make_async_client()
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks = [_embed_batch_async(client, semaphore, model, batch) for batch in batches]
+    return await asyncio.gather(*tasks, return_exceptions=True)
+
+def _create_embeddings_map(model: str, item_ids: List, input_texts: List[str]) -> Dict:
+    """Embeds texts in concurrent batches, falling back to per-item requests when a batch fails.
+
+    Unchanged texts are served from the content-addressed on-disk cache, so
+    only new or modified items hit the Ollama server.
+    """
+    embeddings_map = {}
+
+    # Serve unchanged texts from the cache and only embed the misses
+    cached_vectors = embedding_cache.get_many(model, input_texts)
+    if cached_vectors:
+        logger.info("Embedding cache hit for %d of %d items", len(cached_vectors), len(input_texts))
+    for position, vector in cached_vectors.items():
+        embeddings_map[item_ids[position]] = vector
+
+    miss_positions = [position for position in range(len(input_texts)) if position not in cached_vectors]
+    if not miss_positions:
+        return embeddings_map
+
+    miss_ids = [item_ids[position] for position in miss_positions]
+    miss_texts = [input_texts[position] for position in miss_positions]
+
+    batch_size = get_settings().embed_batch_size
+    id_batches = [miss_ids[start:start + batch_size] for start in range(0, len(miss_ids), batch_size)]
+    text_batches = [miss_texts[start:start + batch_size] for start in range(0, len(miss_texts), batch_size)]
+
+    batch_results = asyncio.run(_embed_many_async(model, text_batches, get_settings().embed_concurrency))
+
+    fallback_texts: List[str] = []
+    fallback_vectors: List[List[float]] = []
+
+    # Successful batches stay as float32 matrices until one final conversion,
+    # so assembly works on compact struct-of-arrays blocks instead of
+    # accumulating boxed Python floats batch by batch
+    matrix_ids: List = []
+    matrix_texts: List[str] = []
+    matrix_blocks: List[np.ndarray] = []
+
+    for batch_ids, batch_texts, batch_result in zip(id_batches, text_batches, batch_results):
+        if isinstance(batch_result, BaseException):
+            logger.warning("Batch embedding failed (%s). Falling back to per-item requests", batch_result)
+            for item_id, text in zip(batch_ids, batch_texts):
+                try:
+                    embedding = _create_embedding(model, text)
+                except Exception as item_error:
+                    logger.error(f"Failed to create embedding for item {item_id}: {item_error}")
+                    continue
+                embeddings_map[item_id] = embedding
+                fallback_texts.append(text)
+                fallback_vectors.append(embedding)
+            continue
+
+        matrix_ids.extend(batch_ids)
+        matrix_texts.extend(batch_texts)
+        matrix_blocks.append(batch_result)
+
+    matrix_rows: List[List[float]] = []
+    if matrix_blocks:
+        # One C-level conversion for all batched rows
+        matrix_rows = np.vstack(matrix_blocks).tolist()
+        for item_id, embedding in zip(matrix_ids, matrix_rows):
+            embeddings_map[item_id] = embedding
+
+    embedding_cache.put_many(model, fallback_texts + matrix_texts, fallback_vectors + matrix_rows)
+
+    return embeddings_map
+
 def _create_embedding(model: str, input_text: str) -> List[float]:
     """Create embedding for given input text."""
     try:
         embedding_response = ollama.embed(model=model, input=input_text)
         if not embedding_response.embeddings:
             raise ValueError("No embedding returned from model")
-        return [float(val) for val in embedding_response.embeddings[0]]
+        # Single C-level conversion instead of a per-element float() loop
+        return np.asarray(embedding_response.embeddings[0], dtype=np.float32).tolist()
     except Exception as e:
         logger.error(f"Failed to create embedding for input '{input_text[:50]}...': {e}")
         raise
@@ -36,22 +152,18 @@ def create_cocktail_embeddings(cocktails: List[Cocktail]) -> Dict[str, List[floa
     
     logger.info("Creating cocktail embeddings...")
     model = _get_embedding_model()
-    logger.info(f"Using embedding model: {model}")
+    logger.info("Using embedding model: %s", model)
 
-    embeddings_map = {}
-
-    for cocktail in cocktails:
-        try:
-            embedding = _create_embedding(model, repr(cocktail))
-            embeddings_map[cocktail.id] = embedding
-        except Exception as e:
-            logger.error(f"Failed to create embedding for cocktail {cocktail.id}: {e}")
-            continue
+    embeddings_map = _create_embeddings_map(
+        model,
+        [cocktail.id for cocktail in cocktails],
+        [cocktail.embedding_text() for cocktail in cocktails]
+    )
 
     if not embeddings_map:
         raise RuntimeError("Failed to create any cocktail embeddings")
 
-    logger.info(f"Created {len(embeddings_map)} cocktail embeddings.")
+    logger.info("Created %d cocktail embeddings.", len(embeddings_map))
     return embeddings_map
 
 def create_ingredient_embeddings(ingredients: List[Ingredient]) -> Dict[str, List[float]]:
@@ -61,34 +173,48 @@ def create_ingredient_embeddings(ingredients: List[Ingredient]) -> Dict[str, Lis
     
     logger.info("Creating ingredient embeddings...")
     model = _get_embedding_model()
-    logger.info(f"Using embedding model: {model}")
+    logger.info("Using embedding model: %s", model)
 
-    embeddings_map = {}
-
-    for ingredient in ingredients:
-        try:
-            embedding = _create_embedding(model, repr(ingredient))
-            embeddings_map[ingredient.id] = embedding
-        except Exception as e:
-            logger.error(f"Failed to create embedding for ingredient {ingredient.id}: {e}")
-            continue
+    ingredient_list = list(ingredients)
+    embeddings_map = _create_embeddings_map(
+        model,
+        [ingredient.id for ingredient in ingredient_list],
+        [ingredient.embedding_text() for ingredient in ingredient_list]
+    )
 
     if not embeddings_map:
         raise RuntimeError("Failed to create any ingredient embeddings")
 
-    logger.info(f"Created {len(embeddings_map)} ingredient embeddings.")
+    logger.info("Created %d ingredient embeddings.", len(embeddings_map))
     return embeddings_map
 
+def embeddings_to_matrix(embeddings_map: Dict) -> tuple:
+    """Returns an (ids, matrix) struct-of-arrays view of an embeddings map.
+
+    The float32 matrix has one row per embedding, suitable for vectorized
+    validation or similarity math without per-element Python overhead.
+    """
+    ids = list(embeddings_map.keys())
+    matrix = np.asarray(list(embeddings_map.values()), dtype=np.float32)
+    return ids, matrix
+
+@functools.lru_cache(maxsize=1024)
+def _embed_query_cached(model: str, query: str) -> tuple:
+    """Embeds a normalized query, memoizing exact repeats in-process."""
+    return tuple(_create_embedding(model, query))
+
 def embed_query(query: str) -> List[float]:
     """Creates and returns the embedding for a given query string."""
     if not query or not query.strip():
         raise ValueError("Query cannot be empty or whitespace")
-    
+
     model = _get_embedding_model()
-    logger.info(f"Embedding query using model: {model}")
+    logger.info("Embedding query using model: %s", model)
 
     try:
-        return _create_embedding(model, query.strip())
+        # Exact repeats are served from the in-process LRU instead of Ollama;
+        # the copy keeps callers from mutating the cached vector
+        return list(_embed_query_cached(model, query.strip()))
     except Exception as e:
         logger.error(f"Failed to embed query '{query}': {e}")
         raise
\ No newline at end of file
@@ -1,23 +1,49 @@
-from pinecone import Pinecone
+from pinecone import Pinecone, Vector
+import logging
+import numpy as np
+import blake3
 import os
-import dotenv
-from typing import List, Dict, Optional, Any
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional
 from models.cocktail import Cocktail
 from models.ingredient import Ingredient
 from config.logger import logger
+from config.settings import get_settings, load_env_once
+from services.embedding_service import embeddings_to_matrix
+from services import semantic_cache
 
-dotenv.load_dotenv()
+load_env_once()
 
-# Initialize Pinecone with error handling
-try:
-    pc = Pinecone()
-    index_name = os.getenv('PINECONE_INDEX_NAME')
-    if not index_name:
-        raise ValueError("PINECONE_INDEX_NAME environment variable not set")
-    index = pc.Index(index_name)
-except Exception as e:
-    logger.error(f"Failed to initialize Pinecone: {e}")
-    raise
+
+def _create_client() -> Pinecone:
+    """Creates the Pinecone client, preferring gRPC when configured.
+
+    The gRPC client keeps one multiplexed HTTP/2 connection alive, so hot-path
+    queries and upserts skip the per-call TLS handshake the REST client can pay.
+    Falls back to REST when the grpc extra is not installed.
+    """
+    if get_settings().pinecone_transport == "grpc":
+        try:
+            from pinecone.grpc import PineconeGRPC
+            return PineconeGRPC()
+        except ImportError as e:
+            logger.warning(f"Pinecone gRPC transport unavailable ({e}). Falling back to REST")
+    return Pinecone()
+
+
+# Thread pool backing async_req upserts/queries; sized for ~30 concurrent
+# in-flight batches, well past what the dataset needs today
+POOL_THREADS = 30
+
+# Constructed lazily by _get_index so importing this module (e.g. during test
+# collection) performs no network handshake
+index: Optional[Any] = None
+_index_lock = threading.Lock()
 
 
 class PineconeError(Exception):
@@ -25,6 +51,30 @@ class PineconeError(Exception):
     pass
 
 
+def _get_index() -> Any:
+    """Returns the Pinecone index, initializing the client on first use."""
+    global index
+    if index is not None:
+        return index
+
+    with _index_lock:
+        if index is None:
+            try:
+                pc = _create_client()
+                index_name = os.getenv('PINECONE_INDEX_NAME')
+                if not index_name:
+                    raise ValueError("PINECONE_INDEX_NAME environment variable not set")
+                try:
+                    index = pc.Index(index_name, pool_threads=POOL_THREADS)
+                except TypeError:
+                    # The gRPC client multiplexes one connection and takes no pool_threads
+                    index = pc.Index(index_name)
+            except Exception as e:
+                logger.error(f"Failed to initialize Pinecone: {e}")
+                raise
+        return index
+
+
 def upsert_cocktail_embeddings(cocktails: List[Cocktail], embeddings: Dict[int, List[float]]) -> None:
     """Upserts cocktail embeddings into Pinecone vector space."""
     if not cocktails:
@@ -43,7 +93,7 @@ def upsert_cocktail_embeddings(cocktails: List[Cocktail], embeddings: Dict[int,
             logger.warning("No valid vectors created for cocktails")
             return
             
-        logger.info(f"Upserting {len(vectors)} cocktail vectors")
+        logger.info("Upserting %d cocktail vectors", len(vectors))
         
         # Upsert vectors into Pinecone
         _upsert_vectors(vectors=vectors)
@@ -71,7 +121,7 @@ def upsert_ingredient_embeddings(ingredients: List[Ingredient], embeddings: Dict
             logger.warning("No valid vectors created for ingredients")
             return
             
-        logger.info(f"Upserting {len(vectors)} ingredient vectors")
+        logger.info("Upserting %d ingredient vectors", len(vectors))
         
         # Upsert vectors into Pinecone
         _upsert_vectors(vectors=vectors)
@@ -81,23 +131,72 @@ def upsert_ingredient_embeddings(ingredients: List[Ingredient], embeddings: Dict
         raise PineconeError(f"Ingredient embedding upsert failed: {e}") from e
 
 
-def _upsert_vectors(vectors: List[Dict[str, Any]]) -> None:
-    """Upserts generic vectors into Pinecone vector space."""
-    if not vectors:
+def _iter_batches(vectors: Iterable[Dict[str, Any]], batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+    """Yields fixed-size batches from a vector iterable without materializing it."""
+    iterator = iter(vectors)
+    while batch := list(islice(iterator, batch_size)):
+        yield batch
+
+
+def _wait_for_upsert(pending: Any) -> Any:
+    """Blocks on one async_req upsert and returns its response.
+
+    The REST client hands back a multiprocessing ApplyResult with .get();
+    the gRPC client hands back a PineconeGrpcFuture, which follows the
+    concurrent.futures interface and only has .result().
+    """
+    get = getattr(pending, "get", None)
+    return get() if get is not None else pending.result()
+
+
+def _upsert_vectors(vectors: Iterable[Dict[str, Any]]) -> None:
+    """Upserts generic vectors into Pinecone vector space.
+
+    Accepts any iterable and streams it: batches are built lazily and
+    dispatched with async_req, with at most POOL_THREADS responses pending,
+    so construction overlaps network sends at flat memory.
+    """
+    if isinstance(vectors, list) and not vectors:
         logger.warning("No vectors to upsert")
         return
-    
+
     # Batch size limit for Pinecone (usually 100)
     batch_size = 100
-    
+
     try:
-        for i in range(0, len(vectors), batch_size):
-            batch = vectors[i:i + batch_size]
-            response = index.upsert(vectors=batch)
-            logger.debug(f"Upserted batch {i//batch_size + 1}: {response}")
-            
-        logger.info(f"Successfully upserted {len(vectors)} vectors")
-        
+        # Vector instances skip the SDK's per-dict key validation and rewrap;
+        # the dataclass only takes plain lists, so values pass through as-is
+        wire_vectors = (
+            Vector(
+                id=vector["id"],
+                values=vector["values"],
+                metadata=vector["metadata"]
+            )
+            for vector in vectors
+        )
+
+        pinecone_index = _get_index()
+        in_flight: deque = deque()
+        batch_count = 0
+        vector_count = 0
+        for batch in _iter_batches(wire_vectors, batch_size):
+            batch_count += 1
+            vector_count += len(batch)
+            in_flight.append(pinecone_index.upsert(vectors=batch, async_req=True))
+            # Bound pending responses so a fast producer cannot pile up batches
+            if len(in_flight) >= POOL_THREADS:
+                logger.debug("Upserted batch: %s", _wait_for_upsert(in_flight.popleft()))
+
+        while in_flight:
+            logger.debug("Upserted batch: %s", _wait_for_upsert(in_flight.popleft()))
+
+        if vector_count == 0:
+            logger.warning("No vectors to upsert")
+            return
+
+        _invalidate_result_caches()
+        logger.info("Successfully upserted %d vectors in %d batches", vector_count, batch_count)
+
     except Exception as e:
         logger.error(f"Failed to upsert vectors: {e}")
         raise PineconeError(f"Vector upsert failed: {e}") from e
@@ -106,13 +205,72 @@ def _upsert_vectors(vectors: List[Dict[str, Any]]) -> None:
 def clear_vectorspace() -> None:
     """Clears the Pinecone vector space by deleting all vectors."""
     try:
-        response = index.delete(delete_all=True)
-        logger.info(f"Cleared vector space: {response}")
+        response = _get_index().delete(delete_all=True)
+        _invalidate_result_caches()
+        logger.info("Cleared vector space: %s", response)
     except Exception as e:
         logger.error(f"Failed to clear vector space: {e}")
         raise PineconeError(f"Vector space clear failed: {e}") from e
 
 
+# Exact-match TTL+LRU cache for repeated query vectors. The text-level
+# semantic cache in services.semantic_cache absorbs near-duplicate queries
+# before embedding; this layer catches identical vectors from batch queries
+# and direct callers without another network round-trip.
+QUERY_CACHE_DISABLED_ENV_VAR = "PINECONE_QUERY_CACHE_DISABLED"
+QUERY_CACHE_TTL_SECONDS = 3600.0
+QUERY_CACHE_MAX_ENTRIES = 10_000
+_query_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_query_cache_lock = threading.Lock()
+
+
+def _query_cache_key(top_k: int, vector: List[float]) -> Optional[str]:
+    """Content-addressed key for one (top_k, vector) query, or None for odd input."""
+    try:
+        payload = np.asarray(vector, dtype=np.float32).tobytes() + str(top_k).encode()
+    except (TypeError, ValueError):
+        return None
+    return blake3.blake3(payload).hexdigest()
+
+
+def _query_cache_get(key: str) -> Optional[Any]:
+    """Returns the fresh cached result for a key, expiring stale entries."""
+    with _query_cache_lock:
+        entry = _query_cache.get(key)
+        if entry is None:
+            return None
+        expires_at, result = entry
+        if time.monotonic() > expires_at:
+            del _query_cache[key]
+            return None
+        _query_cache.move_to_end(key)
+        return result
+
+
+def _query_cache_put(key: str, result: Any) -> None:
+    """Stores a query result, evicting the least recently used entries over the cap."""
+    with _query_cache_lock:
+        _query_cache[key] = (time.monotonic() + QUERY_CACHE_TTL_SECONDS, result)
+        _query_cache.move_to_end(key)
+        while len(_query_cache) > QUERY_CACHE_MAX_ENTRIES:
+            _query_cache.popitem(last=False)
+
+
+def _invalidate_result_caches() -> None:
+    """Drops every result cache derived from the index after it changes.
+
+    Called after upserts and clears so a long-running process never serves
+    matches or vector counts from before the mutation. The text-level
+    semantic cache holds processed match payloads for days, so it has to
+    go too or RAG answers would outlive the vectors behind them.
+    """
+    with _query_cache_lock:
+        _query_cache.clear()
+    with _stats_lock:
+        _stats_cache['ts'] = 0.0
+    semantic_cache.clear()
+
+
 def query_cocktails(top_k: int, vector: List[float]) -> Optional[Any]:
     """Queries Pinecone for the most similar cocktails based on the provided vector."""
     if not vector:
@@ -120,76 +278,137 @@ def query_cocktails(top_k: int, vector: List[float]) -> Optional[Any]:
         return None
     
     if top_k <= 0:
-        logger.warning(f"Invalid top_k value: {top_k}. Using default of 5")
+        logger.warning("Invalid top_k value: %s. Using default of 5", top_k)
         top_k = 5
     
     # Limit top_k to reasonable maximum
     max_top_k = 1000
     if top_k > max_top_k:
-        logger.warning(f"top_k {top_k} exceeds maximum {max_top_k}. Using {max_top_k}")
+        logger.warning("top_k %d exceeds maximum %d. Using %d", top_k, max_top_k, max_top_k)
         top_k = max_top_k
     
+    cache_key = None
+    if os.getenv(QUERY_CACHE_DISABLED_ENV_VAR) != "1":
+        cache_key = _query_cache_key(top_k, vector)
+        if cache_key is not None:
+            cached_result = _query_cache_get(cache_key)
+            if cached_result is not None:
+                return cached_result
+
     try:
-        result = index.query(top_k=top_k, include_metadata=True, vector=vector)
-        logger.debug(f"Query returned {len(result.matches) if hasattr(result, 'matches') and result.matches else 0} matches")
+        result = _get_index().query(top_k=top_k, include_metadata=True, vector=vector)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Query returned %d matches", len(result.matches) if hasattr(result, 'matches') and result.matches else 0)
+        if cache_key is not None and result is not None:
+            _query_cache_put(cache_key, result)
         return result
-        
+
     except Exception as e:
         logger.error(f"Failed to query cocktails: {e}")
         raise PineconeError(f"Cocktail query failed: {e}") from e
 
 
+def _validate_embeddings(embeddings: Dict[int, List[float]]) -> Dict[int, List[float]]:
+    """Filters an embeddings dict down to usable, finite, nonzero vectors.
+
+    Uniform-length vectors are checked in one vectorized numpy pass, which
+    also catches NaN/inf values that would otherwise poison the index;
+    ragged or non-numeric input falls back to the basic list checks only.
+    """
+    valid = {
+        item_id: embedding for item_id, embedding in embeddings.items()
+        if isinstance(embedding, list) and embedding
+    }
+    if not valid:
+        return valid
+
+    try:
+        ids, matrix = embeddings_to_matrix(valid)
+    except (ValueError, TypeError):
+        return valid
+    if matrix.ndim != 2:
+        return valid
+
+    finite_mask = np.isfinite(matrix).all(axis=1) & (np.linalg.norm(matrix, axis=1) > 0)
+    if finite_mask.all():
+        return valid
+
+    logger.warning("Dropping %d embeddings with NaN/inf or zero norm", int((~finite_mask).sum()))
+    return {
+        item_id: valid[item_id]
+        for item_id, keep in zip(ids, finite_mask.tolist()) if keep
+    }
+
+
+def query_cocktails_batch(top_k: int, vectors: List[List[float]]) -> List[Optional[Any]]:
+    """Queries Pinecone for several query vectors concurrently, preserving input order.
+
+    Fanning the round-trips across a thread pool bounds wall time by the
+    slowest query rather than the sum, which matters for multi-query RAG
+    and offline evaluation loops.
+    """
+    if not vectors:
+        logger.warning("No vectors provided for batch query")
+        return []
+
+    try:
+        with ThreadPoolExecutor(max_workers=min(POOL_THREADS, len(vectors))) as executor:
+            return list(executor.map(partial(query_cocktails, top_k), vectors))
+
+    except PineconeError:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to batch query cocktails: {e}")
+        raise PineconeError(f"Batch cocktail query failed: {e}") from e
+
+
 def _create_cocktail_vectors_to_upsert(cocktails: List[Cocktail], embeddings: Dict[int, List[float]]) -> List[Dict[str, Any]]:
     """Creates a list of vectors formatted for upserting into Pinecone."""
     vectors: List[Dict[str, Any]] = []
     skipped_count = 0
 
+    # Resolve usable embeddings once so the loop pays a single lookup per
+    # cocktail instead of a membership test plus two type checks
+    valid_embeddings = _validate_embeddings(embeddings)
+
     for cocktail in cocktails:
         try:
             # Validate cocktail
             if not _is_valid_cocktail(cocktail):
-                logger.warning(f"Skipping invalid cocktail: {cocktail}")
+                logger.warning("Skipping invalid cocktail: %s", cocktail)
                 skipped_count += 1
                 continue
-            
-            # Check if embedding exists
-            if cocktail.id not in embeddings:
-                logger.warning(f"No embedding found for cocktail ID {cocktail.id}")
-                skipped_count += 1
-                continue
-            
-            embedding = embeddings[cocktail.id]
-            if not embedding or not isinstance(embedding, list):
-                logger.warning(f"Invalid embedding for cocktail ID {cocktail.id}")
+
+            embedding = valid_embeddings.get(cocktail.id)
+            if embedding is None:
+                logger.warning("No valid embedding for cocktail ID %s", cocktail.id)
                 skipped_count += 1
                 continue
-            
-            # Build vector entry with safe defaults
+
+            # Reuse metadata built on a previous upsert; otherwise build it
+            # once with safe defaults and cache it on the instance
+            metadata = getattr(cocktail, 'vector_metadata', None)
+            if not isinstance(metadata, dict):
+                metadata = _build_cocktail_metadata(cocktail)
+                cocktail.vector_metadata = metadata
+
             vector_entry = {
-                "id": f"cocktail_{cocktail.id}",
+                "id": "cocktail_%s" % cocktail.id,
                 "values": embedding,
-                "metadata": {
-                    "type": "cocktail",
-                    "cocktail_id": cocktail.id,
-                    "name": _safe_string(cocktail.name),
-                    "tags": _safe_list(cocktail.tags),
-                    "instructions": _safe_string(cocktail.instructions),
-                    "image_url": _safe_string(cocktail.image_url),
-                    "ingredient_names": _safe_list(cocktail.ingredients)
-                }
+                "metadata": metadata
             }
             
             vectors.append(vector_entry)
             
         except Exception as e:
-            logger.warning(f"Error processing cocktail {getattr(cocktail, 'id', 'unknown')}: {e}")
+            logger.warning("Error processing cocktail %s: %s", getattr(cocktail, 'id', 'unknown'), e)
             skipped_count += 1
             continue
 
     if skipped_count > 0:
-        logger.warning(f"Skipped {skipped_count} invalid cocktails")
+        logger.warning("Skipped %d invalid cocktails", skipped_count)
     
-    logger.info(f"Prepared {len(vectors)} cocktail vectors for upsert")
+    logger.info("Prepared %d cocktail vectors for upsert", len(vectors))
     return vectors
 
 
@@ -198,66 +417,76 @@ def _create_ingredient_vectors_to_upsert(ingredients: List[Ingredient], embeddin
     vectors: List[Dict[str, Any]] = []
     skipped_count = 0
 
+    # Resolve usable embeddings once so the loop pays a single lookup per
+    # ingredient instead of a membership test plus two type checks
+    valid_embeddings = _validate_embeddings(embeddings)
+
     for ingredient in ingredients:
         try:
             # Validate ingredient
             if not _is_valid_ingredient(ingredient):
-                logger.warning(f"Skipping invalid ingredient: {ingredient}")
-                skipped_count += 1
-                continue
-            
-            # Check if embedding exists
-            if ingredient.id not in embeddings:
-                logger.warning(f"No embedding found for ingredient ID {ingredient.id}")
+                logger.warning("Skipping invalid ingredient: %s", ingredient)
                 skipped_count += 1
                 continue
-            
-            embedding = embeddings[ingredient.id]
-            if not embedding or not isinstance(embedding, list):
-                logger.warning(f"Invalid embedding for ingredient ID {ingredient.id}")
+
+            embedding = valid_embeddings.get(ingredient.id)
+            if embedding is None:
+                logger.warning("No valid embedding for ingredient ID %s", ingredient.id)
                 skipped_count += 1
                 continue
-            
-            # Build vector entry with safe defaults
+
+            # Reuse metadata built on a previous upsert; otherwise build it
+            # once with safe defaults and cache it on the (frozen) instance
+            metadata = getattr(ingredient, 'vector_metadata', None)
+            if not isinstance(metadata, dict):
+                metadata = _build_ingredient_metadata(ingredient)
+                object.__setattr__(ingredient, 'vector_metadata', metadata)
+
             vector_entry = {
-                "id": f"ingredient_{ingredient.id}",
+                "id": "ingredient_%s" % ingredient.id,
                 "values": embedding,
-                "metadata": {
-                    "type": "ingredient",
-                    "ingredient_id": ingredient.id,
-                    "name": _safe_string(ingredient.name),
-                    "description": _safe_string(ingredient.description),
-                    "alcohol": _safe_bool(ingredient.alcohol),
-                    "type_": _safe_string(ingredient.type),
-                    "image_url": _safe_string(ingredient.image_url)
-                }
+                "metadata": metadata
             }
             
             vectors.append(vector_entry)
             
         except Exception as e:
-            logger.warning(f"Error processing ingredient {getattr(ingredient, 'id', 'unknown')}: {e}")
+            logger.warning("Error processing ingredient %s: %s", getattr(ingredient, 'id', 'unknown'), e)
             skipped_count += 1
             continue
 
     if skipped_count > 0:
-        logger.warning(f"Skipped {skipped_count} invalid ingredients")
+        logger.warning("Skipped %d invalid ingredients", skipped_count)
     
-    logger.info(f"Prepared {len(vectors)} ingredient vectors for upsert")
+    logger.info("Prepared %d ingredient vectors for upsert", len(vectors))
     return vectors
 
 
+# Short-TTL cache so polling loops don't pay a describe_index_stats
+# round-trip (and quota) per call
+STATS_CACHE_TTL_SECONDS = 5.0
+_stats_cache = {'ts': 0.0, 'value': 0}
+_stats_lock = threading.Lock()
+
+
 def get_num_vectors() -> int:
-    """Returns the number of vectors stored in Pinecone."""
-    try:
-        stats = index.describe_index_stats()
-        total_count = stats.get('total_vector_count', 0)
-        logger.debug(f"Vector count: {total_count}")
-        return total_count
-        
-    except Exception as e:
-        logger.error(f"Failed to get vector count: {e}")
-        raise PineconeError(f"Failed to get vector count: {e}") from e
+    """Returns the number of vectors stored in Pinecone, cached for a few seconds."""
+    with _stats_lock:
+        now = time.monotonic()
+        if now - _stats_cache['ts'] < STATS_CACHE_TTL_SECONDS:
+            return _stats_cache['value']
+
+        try:
+            stats = _get_index().describe_index_stats()
+            total_count = stats.get('total_vector_count', 0)
+            logger.debug("Vector count: %s", total_count)
+            _stats_cache['ts'] = now
+            _stats_cache['value'] = total_count
+            return total_count
+
+        except Exception as e:
+            logger.error(f"Failed to get vector count: {e}")
+            raise PineconeError(f"Failed to get vector count: {e}") from e
 
 
 # Helper functions for validation and safe value extraction
@@ -299,12 +528,57 @@ def _safe_list(value: Any) -> List[Any]:
     return [value]
 
 
+# Strings treated as truthy by _safe_bool
+_TRUE_STRS = frozenset({'true', '1', 'yes', 'on'})
+
+
 def _safe_bool(value: Any) -> bool:
     """Safely convert value to boolean."""
+    if value.__class__ is bool:
+        return value
     if value is None:
         return False
-    if isinstance(value, bool):
-        return value
     if isinstance(value, str):
-        return value.lower() in ('true', '1', 'yes', 'on')
-    return bool(value)
\ No newline at end of file
+        return value.lower() in _TRUE_STRS
+    return bool(value)
+
+
+def _compile_metadata_builder(entity_type: str, id_key: str, fields: List[tuple]) -> Any:
+    """Compiles a flat metadata builder with the per-field conversions inlined.
+
+    The metadata schema is fixed at import time, so generating the function
+    once removes the _safe_* helper call per field per item during bulk
+    reindexing; only odd-typed values still reach the helpers.
+    """
+    conversion_exprs = {
+        "string": "'' if item.{attr} is None else str(item.{attr})",
+        "list": "item.{attr} if item.{attr}.__class__ is list else _safe_list(item.{attr})",
+        "bool": "_safe_bool(item.{attr})",
+    }
+    lines = ["def _builder(item):", "    return {"]
+    lines.append(f"        'type': {entity_type!r},")
+    lines.append(f"        {id_key!r}: item.id,")
+    for key, attr, conversion in fields:
+        lines.append(f"        {key!r}: {conversion_exprs[conversion].format(attr=attr)},")
+    lines.append("    }")
+
+    namespace = {"_safe_list": _safe_list, "_safe_bool": _safe_bool}
+    exec("\n".join(lines), namespace)
+    return namespace["_builder"]
+
+
+_build_cocktail_metadata = _compile_metadata_builder("cocktail", "cocktail_id", [
+    ("name", "name", "string"),
+    ("tags", "tags", "list"),
+    ("instructions", "instructions", "string"),
+    ("image_url", "image_url", "string"),
+    ("ingredient_names", "ingredients", "list"),
+])
+
+_build_ingredient_metadata = _compile_metadata_builder("ingredient", "ingredient_id", [
+    ("name", "name", "string"),
+    ("description", "description", "string"),
+    ("alcohol", "alcohol", "bool"),
+    ("type_", "type", "string"),
+    ("image_url", "image_url", "string"),
+])
\ No newline at end of file
@@ -1,11 +1,14 @@
-import json
+import asyncio
+import orjson
+import os
 import traceback
 from typing import List, Dict, Any, Union, Optional
 from dataclasses import dataclass
 
 from config.logger import logger
+from services import semantic_cache
 from services.embedding_service import embed_query
-from services.pinecone_service import query_cocktails
+from services.pinecone_service import query_cocktails, query_cocktails_batch
 
 
 @dataclass
@@ -21,6 +24,17 @@ class RAGError(Exception):
     pass
 
 
+# The round-trip validation duplicates the serialization the transport layer
+# does anyway; _serialize_value already guarantees serializable types, so it
+# is opt-in for debugging rather than paid on every call
+_VALIDATE_JSON = os.getenv('RAG_VALIDATE_JSON') == '1'
+
+# Metadata upserted by this codebase is already cleaned by the _safe_*
+# helpers, so deployments querying only their own index can skip the
+# cleaning walk entirely
+_TRUST_METADATA = os.getenv('RAG_TRUST_METADATA') == '1'
+
+
 def run_cocktail_rag(query: str, top_k: int = 5) -> List[Dict[str, Any]]:
     """
     Retrieve cocktail recommendations based on a query.
@@ -36,21 +50,33 @@ def run_cocktail_rag(query: str, top_k: int = 5) -> List[Dict[str, Any]]:
         RAGError: If the RAG process fails
     """
     try:
-        logger.info(f"Processing query: {query}")
+        logger.info("Processing query: %s", query)
         
         # Validate input
         _validate_query(query)
-        
+
+        # Serve repeated queries straight from the cache
+        cached_matches = semantic_cache.get_exact(query, top_k)
+        if cached_matches is not None:
+            return cached_matches
+
         # Create embedding for the query
         embedding = _create_query_embedding(query)
-        
+
+        # Near-duplicate phrasings hit here, skipping the vector database
+        cached_matches = semantic_cache.get_semantic(query, top_k, embedding)
+        if cached_matches is not None:
+            return cached_matches
+
         # Query vector database
         results = _query_vector_database(embedding, top_k)
-        
+
         # Process and serialize matches
         processed_matches = _process_query_results(results)
-        
-        logger.info(f"Successfully processed {len(processed_matches)} matches")
+
+        semantic_cache.put(query, top_k, embedding, processed_matches)
+
+        logger.info("Successfully processed %d matches", len(processed_matches))
         return processed_matches
         
     except RAGError:
@@ -62,6 +88,30 @@ def run_cocktail_rag(query: str, top_k: int = 5) -> List[Dict[str, Any]]:
         raise RAGError(f"RAG processing failed: {str(e)}") from e
 
 
+def _warm_vector_database() -> None:
+    """Builds the Pinecone client and index ahead of use; failures only log."""
+    try:
+        from services.pinecone_service import _get_index
+        _get_index()
+    except Exception as e:
+        logger.debug("Vector database warmup skipped: %s", e)
+
+
+async def run_cocktail_rag_async(query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+    """Async entry point for the RAG pipeline.
+
+    Kicks off Pinecone client construction (TLS handshake, connection pool)
+    in parallel with the blocking embed-and-query pipeline, so on a cold
+    start the two network setups overlap instead of running back to back.
+    The sync run_cocktail_rag keeps its contract for direct callers.
+    """
+    warmup = asyncio.create_task(asyncio.to_thread(_warm_vector_database))
+    try:
+        return await asyncio.to_thread(run_cocktail_rag, query, top_k)
+    finally:
+        await warmup
+
+
 def _validate_query(query: str) -> None:
     """Validate the input query."""
     if not query or not isinstance(query, str) or not query.strip():
@@ -75,21 +125,24 @@ def _create_query_embedding(query: str) -> List[float]:
         if embedding is None:
             raise RAGError("Failed to create embedding for query")
         
-        logger.info(f"Created embedding with {len(embedding)} dimensions")
+        logger.info("Created embedding with %d dimensions", len(embedding))
         return embedding
     except Exception as e:
         logger.error(f"Failed to create embedding: {str(e)}")
         raise RAGError(f"Embedding creation failed: {str(e)}") from e
 
 
-def _query_vector_database(embedding: List[float], top_k: int) -> Any:
-    """Query the vector database with the embedding."""
+def _query_vector_database(embedding: Union[List[float], List[List[float]]], top_k: int) -> Any:
+    """Query the vector database with one embedding, or several concurrently."""
     try:
-        results = query_cocktails(top_k=top_k, vector=embedding)
+        if embedding and isinstance(embedding[0], (list, tuple)):
+            results = query_cocktails_batch(top_k=top_k, vectors=embedding)
+        else:
+            results = query_cocktails(top_k=top_k, vector=embedding)
         if results is None:
             raise RAGError("No results returned from vector database")
         
-        logger.debug(f"Vector database results type: {type(results)}")
+        logger.debug("Vector database results type: %s", type(results))
         return results
     except Exception as e:
         logger.error(f"Vector database query failed: {str(e)}")
@@ -105,19 +158,21 @@ def _process_query_results(results: Any) -> List[Dict[str, Any]]:
         logger.info("No matches found")
         return []
     
-    # Convert matches to serializable format
+    # Convert matches to serializable format; the bound-method hoist saves a
+    # lookup per match when rerankers request large top_k values
     processed_matches = []
+    append_match = processed_matches.append
     for match in matches:
         try:
-            processed_match = _process_single_match(match)
-            processed_matches.append(processed_match)
+            append_match(_process_single_match(match))
         except Exception as match_error:
-            logger.warning(f"Skipping match due to processing error: {str(match_error)}")
+            logger.warning("Skipping match due to processing error: %s", match_error)
             continue
-    
-    # Validate JSON serialization
-    _validate_json_serialization(processed_matches)
-    
+
+    # Validate JSON serialization (opt-in, see _VALIDATE_JSON)
+    if _VALIDATE_JSON:
+        _validate_json_serialization(processed_matches)
+
     return processed_matches
 
 
@@ -132,7 +187,29 @@ def _extract_matches(results: Any) -> List[Any]:
 
 
 def _process_single_match(match: Any) -> Dict[str, Any]:
-    """Process a single match into a serializable format."""
+    """Process a single match into a serializable format.
+
+    Pinecone's ScoredVector shape is read directly first; anything else
+    falls back to the defensive per-field extraction.
+    """
+    try:
+        match_id = match.id
+        score = match.score
+        metadata = match.metadata
+    except AttributeError:
+        match_id = score = metadata = None
+
+    if match_id is not None and score is not None:
+        if _TRUST_METADATA and isinstance(metadata, dict):
+            cleaned_metadata = dict(metadata)
+        else:
+            cleaned_metadata = _clean_metadata_dict(metadata or {})
+        return {
+            'id': str(match_id),
+            'score': float(score),
+            'metadata': cleaned_metadata
+        }
+
     return {
         'id': _extract_match_id(match),
         'score': _extract_match_score(match),
@@ -167,60 +244,121 @@ def _extract_and_clean_metadata(match: Any) -> Dict[str, Any]:
         metadata = match.metadata
     elif isinstance(match, dict) and match.get('metadata') is not None:
         metadata = match.get('metadata')
-    
+
+    if _TRUST_METADATA and isinstance(metadata, dict):
+        return dict(metadata)
+
     return _clean_metadata_dict(metadata)
 
 
+# Exact-type fast paths for the metadata walker; subclasses fall through to
+# the isinstance checks below
+_JSON_SCALAR_TYPES = frozenset({str, int, float, bool})
+
+
 def _clean_metadata_dict(data: Any) -> Dict[str, Any]:
     """
-    Recursively clean metadata to remove None values and ensure JSON serialization.
-    
+    Iteratively clean metadata to remove None values and ensure JSON serialization.
+
+    Walks the structure with an explicit stack instead of recursion, so deeply
+    nested metadata cannot exhaust the recursion limit, and dispatches on
+    exact type before falling back to isinstance checks.
+
     Args:
         data: The data to clean
-        
+
     Returns:
         Cleaned dictionary with None values removed and all values serializable
     """
     if not isinstance(data, dict):
         return {} if data is None else _serialize_value(data)
-    
-    cleaned = {}
-    for key, value in data.items():
-        if value is None:
-            continue
-        
-        cleaned_value = _clean_value(value)
-        if cleaned_value is not None and cleaned_value != {}:
-            cleaned[str(key)] = cleaned_value
-    
-    return cleaned
-
 
-def _clean_value(value: Any) -> Any:
-    """Clean a single value for JSON serialization."""
-    if value is None:
-        return None
-    elif isinstance(value, dict):
-        return _clean_metadata_dict(value)
-    elif isinstance(value, (list, tuple)):
-        cleaned_list = [_clean_value(item) for item in value if item is not None]
-        return [item for item in cleaned_list if item is not None]
+    # Metadata this codebase upserts is a flat dict of primitives (plus lists
+    # of primitives), so one scan usually replaces the whole walk below
+    for value in data.values():
+        value_type = type(value)
+        if value_type in _JSON_SCALAR_TYPES:
+            continue
+        if value_type is list and all(type(item) in _JSON_SCALAR_TYPES for item in value):
+            continue
+        break
     else:
-        return _serialize_value(value)
+        return {str(key): value for key, value in data.items()}
+
+    cleaned: Dict[str, Any] = {}
+    # Each entry pairs a source container with the destination being built
+    stack = [(data, cleaned)]
+    # Nested dict placements, pruned after the walk if they turn out empty
+    dict_placements = []
+
+    while stack:
+        source, destination = stack.pop()
+
+        if isinstance(source, dict):
+            for key, value in source.items():
+                if value is None:
+                    continue
+
+                value_type = type(value)
+                if value_type in _JSON_SCALAR_TYPES:
+                    destination[str(key)] = value
+                elif value_type is dict or isinstance(value, dict):
+                    child: Dict[str, Any] = {}
+                    destination[str(key)] = child
+                    dict_placements.append((destination, str(key), child))
+                    stack.append((value, child))
+                elif value_type in (list, tuple) or isinstance(value, (list, tuple)):
+                    child_list: List[Any] = []
+                    destination[str(key)] = child_list
+                    stack.append((value, child_list))
+                else:
+                    destination[str(key)] = _serialize_value(value)
+        else:
+            for item in source:
+                if item is None:
+                    continue
+
+                item_type = type(item)
+                if item_type in _JSON_SCALAR_TYPES:
+                    destination.append(item)
+                elif item_type is dict or isinstance(item, dict):
+                    child = {}
+                    destination.append(child)
+                    stack.append((item, child))
+                elif item_type in (list, tuple) or isinstance(item, (list, tuple)):
+                    child_list = []
+                    destination.append(child_list)
+                    stack.append((item, child_list))
+                else:
+                    destination.append(_serialize_value(item))
+
+    # Drop empty nested dicts, children first since they were placed last
+    for parent, key, child in reversed(dict_placements):
+        if not child:
+            del parent[key]
+
+    return cleaned
 
 
 def _serialize_value(value: Any) -> Union[str, int, float, bool]:
-    """Convert a value to a JSON-serializable type."""
+    """Convert a value to a JSON-serializable type.
+
+    The exact-type set lookup settles the common case in one hash probe;
+    scalar subclasses (e.g. numpy float64) still pass through the
+    isinstance fallback rather than being stringified.
+    """
+    if type(value) in _JSON_SCALAR_TYPES:
+        return value
     if isinstance(value, (str, int, float, bool)):
         return value
-    else:
-        return str(value)
+    return str(value)
 
 
 def _validate_json_serialization(data: List[Dict[str, Any]]) -> None:
     """Validate that the data can be JSON serialized."""
     try:
-        json.dumps(data)
+        # Single fast encode pass; orjson is several times faster than stdlib json
+        orjson.dumps(data)
         logger.debug("JSON serialization validation passed")
     except (TypeError, ValueError) as e:
         raise RAGError(f"Failed to serialize result to JSON: {str(e)}") from e
\ No newline at end of file
@@ -0,0 +1,415 @@
+import os
+import re
+import string
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config.logger import logger
+from config.settings import load_env_once
+
+load_env_once()
+
+# Constants
+CACHE_DISABLED_ENV_VAR = "SEMANTIC_CACHE_DISABLED"
+CACHE_THRESHOLD_ENV_VAR = "SEMANTIC_CACHE_THRESHOLD"
+DEFAULT_CACHE_THRESHOLD = 0.95
+CACHE_MAX_ENTRIES_ENV_VAR = "SEMANTIC_CACHE_MAX_ENTRIES"
+DEFAULT_CACHE_MAX_ENTRIES = 1024
+CACHE_TTL_ENV_VAR = "SEMANTIC_CACHE_TTL_SECONDS"
+DEFAULT_CACHE_TTL_SECONDS = 7 * 24 * 3600
+LSH_TABLES_ENV_VAR = "RAG_LSH_TABLES"
+DEFAULT_LSH_TABLES = 8
+# Few bits per table plus multi-probe of the single-bit-flip buckets: with
+# long signatures a query at cosine 0.97 almost never shares an exact bucket
+# with its near-duplicate, which silently reduces the cache to exact matching
+LSH_BITS = 16
+LSH_SEED = 0
+CACHE_BACKEND_ENV_VAR = "RAG_CACHE_BACKEND"
+FAISS_HNSW_NEIGHBORS = 32
+
+
+@dataclass(slots=True)
+class _CacheEntry:
+    """One cached query with its result payload and bookkeeping timestamps."""
+    key: Tuple[str, int]
+    payload: List[Dict[str, Any]]
+    created_at: float
+    last_used_at: float
+
+
+# Cached L2-normalized query embeddings, one row per entry in _entries
+_matrix: Optional[np.ndarray] = None
+_entries: List[_CacheEntry] = []
+_exact: Dict[Tuple[str, int], int] = {}
+# Random-projection LSH sidecar: signature -> candidate rows, one dict per table
+_projections: Optional[np.ndarray] = None
+_lsh_buckets: List[Dict[bytes, List[int]]] = []
+# Optional faiss ANN backend; None until first probe, False when unavailable
+_faiss: Any = None
+_faiss_index: Any = None
+_lock = threading.Lock()
+
+hits = 0
+misses = 0
+
+
+def _is_disabled() -> bool:
+    """Whether the semantic cache is disabled via environment variable."""
+    return os.getenv(CACHE_DISABLED_ENV_VAR) == "1"
+
+
+def _get_threshold() -> float:
+    """Cosine-similarity threshold above which a cached query counts as a hit."""
+    raw_threshold = os.getenv(CACHE_THRESHOLD_ENV_VAR)
+    if not raw_threshold:
+        return DEFAULT_CACHE_THRESHOLD
+    try:
+        return float(raw_threshold)
+    except ValueError:
+        logger.warning(f"Invalid {CACHE_THRESHOLD_ENV_VAR} value '{raw_threshold}'. Using default of {DEFAULT_CACHE_THRESHOLD}")
+        return DEFAULT_CACHE_THRESHOLD
+
+
+def _get_max_entries() -> int:
+    """Maximum number of cached queries before LRU eviction kicks in."""
+    raw_max = os.getenv(CACHE_MAX_ENTRIES_ENV_VAR)
+    if not raw_max:
+        return DEFAULT_CACHE_MAX_ENTRIES
+    try:
+        max_entries = int(raw_max)
+    except ValueError:
+        logger.warning(f"Invalid {CACHE_MAX_ENTRIES_ENV_VAR} value '{raw_max}'. Using default of {DEFAULT_CACHE_MAX_ENTRIES}")
+        return DEFAULT_CACHE_MAX_ENTRIES
+    return max_entries if max_entries > 0 else DEFAULT_CACHE_MAX_ENTRIES
+
+
+def _get_ttl_seconds() -> float:
+    """Seconds a cached result stays valid before it is treated as a miss."""
+    raw_ttl = os.getenv(CACHE_TTL_ENV_VAR)
+    if not raw_ttl:
+        return DEFAULT_CACHE_TTL_SECONDS
+    try:
+        return float(raw_ttl)
+    except ValueError:
+        logger.warning(f"Invalid {CACHE_TTL_ENV_VAR} value '{raw_ttl}'. Using default of {DEFAULT_CACHE_TTL_SECONDS}")
+        return DEFAULT_CACHE_TTL_SECONDS
+
+
+def _load_faiss() -> Any:
+    """Imports faiss on first use; remembers when it is unavailable."""
+    global _faiss
+    if _faiss is None:
+        try:
+            import faiss
+            _faiss = faiss
+        except ImportError:
+            logger.warning(f"{CACHE_BACKEND_ENV_VAR}=faiss but faiss is not installed. Falling back to numpy backend")
+            _faiss = False
+    return _faiss if _faiss else None
+
+
+def _faiss_enabled() -> bool:
+    """Whether the faiss ANN backend is requested and importable."""
+    return os.getenv(CACHE_BACKEND_ENV_VAR, "numpy").lower() == "faiss" and _load_faiss() is not None
+
+
+def _faiss_add(row: int, vector: np.ndarray) -> None:
+    """Adds a cached row to the faiss index, creating it for this dimension if needed.
+
+    Must be called with the lock held.
+    """
+    global _faiss_index
+    faiss = _load_faiss()
+    dimension = vector.shape[0]
+    if _faiss_index is None or _faiss_index.d != dimension:
+        # Inner product over L2-normalized rows is cosine similarity
+        _faiss_index = faiss.IndexIDMap2(
+            faiss.IndexHNSWFlat(dimension, FAISS_HNSW_NEIGHBORS, faiss.METRIC_INNER_PRODUCT)
+        )
+    _faiss_index.add_with_ids(vector.reshape(1, -1), np.asarray([row], dtype=np.int64))
+
+
+def _rebuild_faiss_index() -> None:
+    """Re-adds all cached rows, e.g. after eviction renumbers them.
+
+    HNSW does not support removals, so the index is rebuilt from the matrix.
+    Must be called with the lock held.
+    """
+    global _faiss_index
+    _faiss_index = None
+    if _matrix is not None and _faiss_enabled():
+        for row in range(_matrix.shape[0]):
+            _faiss_add(row, _matrix[row])
+
+
+def _get_lsh_tables() -> int:
+    """Number of LSH hash tables for the prefilter; 0 disables it."""
+    raw_tables = os.getenv(LSH_TABLES_ENV_VAR)
+    if not raw_tables:
+        return DEFAULT_LSH_TABLES
+    try:
+        tables = int(raw_tables)
+    except ValueError:
+        logger.warning(f"Invalid {LSH_TABLES_ENV_VAR} value '{raw_tables}'. Using default of {DEFAULT_LSH_TABLES}")
+        return DEFAULT_LSH_TABLES
+    return tables if tables >= 0 else DEFAULT_LSH_TABLES
+
+
+def _ensure_projections(dimension: int) -> None:
+    """Lazily builds the fixed random projection matrix for the current dimension.
+
+    Must be called with the lock held.
+    """
+    global _projections, _lsh_buckets
+    tables = _get_lsh_tables()
+    if tables == 0:
+        return
+    if _projections is None or _projections.shape[1] != dimension:
+        rng = np.random.default_rng(LSH_SEED)
+        _projections = rng.standard_normal((tables * LSH_BITS, dimension)).astype(np.float32)
+        _lsh_buckets = [{} for _ in range(tables)]
+
+
+def _signatures(vector: np.ndarray) -> List[bytes]:
+    """Per-table packed sign bits of the vector's random projections."""
+    bits = _projections @ vector > 0
+    table_count = len(_lsh_buckets)
+    return [
+        np.packbits(bits[table * LSH_BITS:(table + 1) * LSH_BITS]).tobytes()
+        for table in range(table_count)
+    ]
+
+
+def _index_row(row: int, vector: np.ndarray) -> None:
+    """Adds a cached row to every LSH table bucket its signature lands in."""
+    if _projections is None:
+        return
+    for bucket, signature in zip(_lsh_buckets, _signatures(vector)):
+        bucket.setdefault(signature, []).append(row)
+
+
+def _rebuild_lsh_index() -> None:
+    """Re-indexes all cached rows, e.g. after eviction renumbers them."""
+    if _projections is None:
+        return
+    for bucket in _lsh_buckets:
+        bucket.clear()
+    if _matrix is not None:
+        for row in range(_matrix.shape[0]):
+            _index_row(row, _matrix[row])
+
+
+def _probe_signatures(vector: np.ndarray) -> List[List[bytes]]:
+    """Per-table signatures to probe: the exact bucket plus every one-bit flip.
+
+    A near-duplicate at cosine 0.97 disagrees with the query on each
+    projection sign with probability ~0.08, so requiring an exact signature
+    match loses most true hits. Probing the Hamming-distance-1 buckets too
+    keeps per-table recall high enough that eight tables together miss
+    almost nothing above the threshold.
+    """
+    bits = _projections @ vector > 0
+    probes = []
+    for table in range(len(_lsh_buckets)):
+        table_bits = bits[table * LSH_BITS:(table + 1) * LSH_BITS]
+        signatures = [np.packbits(table_bits).tobytes()]
+        for position in range(LSH_BITS):
+            flipped = table_bits.copy()
+            flipped[position] ^= True
+            signatures.append(np.packbits(flipped).tobytes())
+        probes.append(signatures)
+    return probes
+
+
+def _lsh_candidates(query_vector: np.ndarray) -> Optional[List[int]]:
+    """Candidate rows sharing a probed LSH bucket with the query; None when disabled."""
+    if _projections is None or _projections.shape[1] != query_vector.shape[0]:
+        return None
+    candidates = set()
+    for bucket, signatures in zip(_lsh_buckets, _probe_signatures(query_vector)):
+        for signature in signatures:
+            candidates.update(bucket.get(signature, ()))
+    return sorted(candidates)
+
+
+# Precompiled so normalization is a pair of C-level passes per query
+_PUNCT_TABLE = str.maketrans('', '', string.punctuation)
+_WS_RE = re.compile(r'\s+')
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a query for cache keying: lowercase, no punctuation, collapsed whitespace."""
+    return _WS_RE.sub(' ', query.translate(_PUNCT_TABLE).lower()).strip()
+
+
+def _normalize_vector(embedding: List[float]) -> Optional[np.ndarray]:
+    """L2-normalize an embedding to float32; None for zero or invalid vectors."""
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = float(np.linalg.norm(vector))
+    if norm == 0.0 or not np.isfinite(norm):
+        return None
+    return vector / norm
+
+
+def _is_fresh(entry: _CacheEntry, now: float) -> bool:
+    """Whether the entry is still within its TTL."""
+    return now - entry.created_at <= _get_ttl_seconds()
+
+
+def _record_hit(row: int, now: float) -> List[Dict[str, Any]]:
+    """Marks a row as used and returns a copy of its payload."""
+    global hits
+    entry = _entries[row]
+    entry.last_used_at = now
+    hits += 1
+    # Shallow copy so callers cannot reorder the cached list
+    return list(entry.payload)
+
+
+def _record_miss() -> None:
+    global misses
+    misses += 1
+
+
+def get_exact(query: str, top_k: int) -> Optional[List[Dict[str, Any]]]:
+    """Returns the cached result for an exact normalized-query match, if fresh."""
+    if _is_disabled():
+        return None
+
+    key = (normalize_query(query), top_k)
+    now = time.time()
+    with _lock:
+        row = _exact.get(key)
+        if row is not None and _is_fresh(_entries[row], now):
+            logger.info("Semantic cache exact hit for query: %s", key[0])
+            return _record_hit(row, now)
+        _record_miss()
+        return None
+
+
+def get_semantic(query: str, top_k: int, embedding: List[float]) -> Optional[List[Dict[str, Any]]]:
+    """Returns the cached result of the most similar past query above the threshold.
+
+    One GEMV over the cached embedding matrix; an argmax row counts as a hit
+    when it clears the cosine threshold, was queried with the same top_k,
+    and has not expired.
+    """
+    if _is_disabled():
+        return None
+
+    query_vector = _normalize_vector(embedding)
+    if query_vector is None:
+        return None
+
+    now = time.time()
+    with _lock:
+        if _matrix is None or not len(_entries):
+            _record_miss()
+            return None
+
+        # The faiss backend answers the nearest row directly; otherwise score
+        # rows sharing an LSH bucket, or fall back to a full scan when the
+        # prefilter is disabled
+        if _faiss_enabled() and _faiss_index is not None and _faiss_index.ntotal:
+            faiss_scores, faiss_rows = _faiss_index.search(query_vector.reshape(1, -1), 1)
+            row = int(faiss_rows[0, 0])
+            if row < 0:
+                _record_miss()
+                return None
+            best_score = float(faiss_scores[0, 0])
+        elif (candidate_rows := _lsh_candidates(query_vector)) is None:
+            scores = _matrix @ query_vector
+            row = int(np.argmax(scores))
+            best_score = float(scores[row])
+        elif candidate_rows:
+            scores = _matrix[candidate_rows] @ query_vector
+            row = candidate_rows[int(np.argmax(scores))]
+            best_score = float(np.max(scores))
+        else:
+            _record_miss()
+            return None
+
+        entry = _entries[row]
+        if best_score >= _get_threshold() and entry.key[1] == top_k and _is_fresh(entry, now):
+            logger.info("Semantic cache hit (score %.3f) for query: %s", best_score, normalize_query(query))
+            return _record_hit(row, now)
+
+        _record_miss()
+        return None
+
+
+def put(query: str, top_k: int, embedding: List[float], payload: List[Dict[str, Any]]) -> None:
+    """Caches the result payload for a query embedding, evicting LRU entries if full."""
+    if _is_disabled():
+        return
+
+    query_vector = _normalize_vector(embedding)
+    if query_vector is None:
+        return
+
+    global _matrix
+    key = (normalize_query(query), top_k)
+    now = time.time()
+    entry = _CacheEntry(key=key, payload=list(payload), created_at=now, last_used_at=now)
+
+    with _lock:
+        if key in _exact:
+            # Refresh in place; the embedding for the same text is unchanged
+            row = _exact[key]
+            _entries[row] = entry
+            return
+
+        _entries.append(entry)
+        _exact[key] = len(_entries) - 1
+        row_vector = query_vector.reshape(1, -1)
+        _matrix = row_vector if _matrix is None else np.vstack([_matrix, row_vector])
+        _ensure_projections(query_vector.shape[0])
+        _index_row(len(_entries) - 1, query_vector)
+        if _faiss_enabled():
+            _faiss_add(len(_entries) - 1, query_vector)
+        _evict_if_needed(now)
+
+
+def _evict_if_needed(now: float) -> None:
+    """Drops expired and least-recently-used entries once over capacity.
+
+    Must be called with the lock held.
+    """
+    global _matrix
+    max_entries = _get_max_entries()
+    if len(_entries) <= max_entries:
+        return
+
+    keep_rows = [row for row, entry in enumerate(_entries) if _is_fresh(entry, now)]
+    if len(keep_rows) > max_entries:
+        keep_rows.sort(key=lambda row: _entries[row].last_used_at)
+        keep_rows = sorted(keep_rows[-max_entries:])
+
+    evicted_count = len(_entries) - len(keep_rows)
+    kept_entries = [_entries[row] for row in keep_rows]
+    _matrix = _matrix[keep_rows] if keep_rows else None
+    _entries.clear()
+    _entries.extend(kept_entries)
+    _exact.clear()
+    _exact.update({entry.key: row for row, entry in enumerate(_entries)})
+    _rebuild_lsh_index()
+    _rebuild_faiss_index()
+    logger.debug("Semantic cache evicted %d entries", evicted_count)
+
+
+def clear() -> None:
+    """Empties the cache and resets the hit/miss counters."""
+    global _matrix, _projections, _faiss_index, hits, misses
+    with _lock:
+        _matrix = None
+        _projections = None
+        _faiss_index = None
+        _lsh_buckets.clear()
+        _entries.clear()
+        _exact.clear()
+        hits = 0
+        misses = 0
@@ -0,0 +1,68 @@
+import sys
+import os
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.ingredient import Ingredient
+from services.cocktail_data_service import create_cocktails
+
+
+@pytest.fixture(scope="session")
+def sample_cocktails():
+    """Small sample of cocktails, parsed once per test session."""
+    return create_cocktails()[:4]
+
+
+@pytest.fixture(scope="session")
+def sample_ingredients():
+    """Sample ingredients shared across the test session."""
+    return [
+        Ingredient(
+            id=1,
+            name="Vodka",
+            description="A clear distilled alcoholic beverage.",
+            alcohol=True,
+            type="Spirit",
+            image_url="https://example.com/vodka.png"
+        ),
+        Ingredient(
+            id=2,
+            name="Lime Juice",
+            description="Juice squeezed from fresh limes.",
+            alcohol=False,
+            type="Mixer",
+            image_url="https://example.com/lime_juice.png"
+        ),
+        Ingredient(
+            id=3,
+            name="Simple Syrup",
+            description="A sweetener made by dissolving sugar in water.",
+            alcohol=False,
+            type="Sweetener",
+            image_url="https://example.com/simple_syrup.png"
+        ),
+    ]
+
+
+@pytest.fixture(autouse=True)
+def isolated_embedding_cache(tmp_path, monkeypatch):
+    """Point the on-disk embedding cache at a per-test location so tests stay hermetic."""
+    monkeypatch.setenv("EMBEDDING_CACHE_PATH", str(tmp_path / "embeddings.db"))
+
+
+@pytest.fixture(autouse=True)
+def reset_embedding_caches():
+    """Clear in-process caches so tests stay independent."""
+    from config import settings
+    from services import embedding_service, semantic_cache
+    settings.get_settings.cache_clear()
+    embedding_service._get_embedding_model.cache_clear()
+    embedding_service._embed_query_cached.cache_clear()
+    semantic_cache.clear()
+    pinecone_service = sys.modules.get("services.pinecone_service")
+    if pinecone_service is not None:
+        pinecone_service._stats_cache['ts'] = 0.0
+        pinecone_service._query_cache.clear()
+    yield
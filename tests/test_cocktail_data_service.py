@@ -1,7 +1,7 @@
 import sys
 import os
 import pytest
-from unittest.mock import patch, mock_open
+from unittest.mock import patch
 import json
 
 # Add the parent directory to the path to import from the main module
@@ -12,47 +12,53 @@ from models.cocktail import Cocktail
 from models.ingredient import Ingredient
 
 
+@pytest.fixture
+def data_file(tmp_path, monkeypatch):
+    """Yields a writer that puts content in a real temp file and points data_path at it."""
+    # Make sure a real DATA_PATH from the environment can't shadow the temp file
+    monkeypatch.delenv("DATA_PATH", raising=False)
+
+    def write(content: str):
+        path = tmp_path / "data.json"
+        path.write_text(content, encoding="utf-8")
+        monkeypatch.setenv("data_path", str(path))
+        return path
+
+    return write
+
+
 class TestLoadCocktailData:
     """Test cases for load_cocktail_data function"""
-    
+
     def test_missing_data_path_env_var(self):
         """Test that ValueError is raised when data_path env var is not set"""
         with patch.dict(os.environ, {}, clear=True):
             with pytest.raises(ValueError, match="data_path environment variable is not set"):
                 load_cocktail_data()
-    
+
     def test_file_not_found(self):
         """Test that FileNotFoundError is raised when data file doesn't exist"""
-        with patch.dict(os.environ, {"data_path": "/nonexistent/path.json"}):
+        with patch.dict(os.environ, {"data_path": "/nonexistent/path.json"}, clear=True):
             with pytest.raises(FileNotFoundError, match="Data file not found at path"):
                 load_cocktail_data()
-    
-    def test_invalid_json(self):
+
+    def test_invalid_json(self, data_file):
         """Test that ValueError is raised for invalid JSON"""
-        mock_data = "invalid json content"
-        with patch.dict(os.environ, {"data_path": "test.json"}):
-            with patch("builtins.open", mock_open(read_data=mock_data)):
-                with patch("os.path.exists", return_value=True):
-                    with pytest.raises(ValueError, match="Invalid JSON in data file"):
-                        load_cocktail_data()
-    
-    def test_non_list_data(self):
+        data_file("invalid json content")
+        with pytest.raises(ValueError, match="Invalid JSON in data file"):
+            load_cocktail_data()
+
+    def test_non_list_data(self, data_file):
         """Test that ValueError is raised when data is not a list"""
-        mock_data = json.dumps({"not": "a list"})
-        with patch.dict(os.environ, {"data_path": "test.json"}):
-            with patch("builtins.open", mock_open(read_data=mock_data)):
-                with patch("os.path.exists", return_value=True):
-                    with pytest.raises(ValueError, match="Data file must contain a list of cocktails"):
-                        load_cocktail_data()
-    
-    def test_valid_data_loading(self):
+        data_file(json.dumps({"not": "a list"}))
+        with pytest.raises(ValueError, match="Data file must contain a list of cocktails"):
+            load_cocktail_data()
+
+    def test_valid_data_loading(self, data_file):
         """Test successful data loading"""
-        mock_data = json.dumps([{"id": 1, "name": "Test Cocktail"}])
-        with patch.dict(os.environ, {"data_path": "test.json"}):
-            with patch("builtins.open", mock_open(read_data=mock_data)):
-                with patch("os.path.exists", return_value=True):
-                    result = load_cocktail_data()
-                    assert result == [{"id": 1, "name": "Test Cocktail"}]
+        data_file(json.dumps([{"id": 1, "name": "Test Cocktail"}]))
+        result = load_cocktail_data()
+        assert list(result) == [{"id": 1, "name": "Test Cocktail"}]
 
 
 class TestCreateCocktails:
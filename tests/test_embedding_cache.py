@@ -0,0 +1,90 @@
+import sys
+import os
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import embedding_cache
+
+# The autouse conftest fixture points EMBEDDING_CACHE_PATH at a per-test
+# temp file, so every test starts from an empty cache.
+
+MODEL = "test_model"
+TEXTS = ["mojito text", "margarita text", "daiquiri text"]
+VECTORS = [
+    [0.5, -1.25, 3.0, 0.0],
+    [127.0, -127.0, 1.0, -1.0],
+    [0.001, 0.002, -0.003, 0.004],
+]
+
+
+class TestCacheKey:
+    """Test cases for cache_key"""
+
+    def test_key_is_deterministic(self):
+        assert embedding_cache.cache_key(MODEL, "text") == embedding_cache.cache_key(MODEL, "text")
+
+    def test_key_differs_by_text_and_model(self):
+        assert embedding_cache.cache_key(MODEL, "a") != embedding_cache.cache_key(MODEL, "b")
+        assert embedding_cache.cache_key("m1", "a") != embedding_cache.cache_key("m2", "a")
+
+
+class TestRoundTrip:
+    """Test cases for put_many/get_many"""
+
+    def test_round_trip_positions(self):
+        embedding_cache.put_many(MODEL, TEXTS, VECTORS)
+        hits = embedding_cache.get_many(MODEL, TEXTS)
+        assert set(hits) == {0, 1, 2}
+
+    def test_int8_round_trip_accuracy(self):
+        # Symmetric int8 quantization bounds the error per element by half a
+        # quantization step: max|v| / 127 / 2
+        embedding_cache.put_many(MODEL, TEXTS, VECTORS)
+        hits = embedding_cache.get_many(MODEL, TEXTS)
+        for position, vector in enumerate(VECTORS):
+            step = max(abs(value) for value in vector) / 127.0
+            assert np.allclose(hits[position], vector, atol=step * 0.51)
+
+    def test_zero_vector_round_trip(self):
+        embedding_cache.put_many(MODEL, ["zeroes"], [[0.0, 0.0, 0.0]])
+        hits = embedding_cache.get_many(MODEL, ["zeroes"])
+        assert hits[0] == [0.0, 0.0, 0.0]
+
+    def test_put_overwrites_existing_entry(self):
+        embedding_cache.put_many(MODEL, ["text"], [[1.0, 2.0]])
+        embedding_cache.put_many(MODEL, ["text"], [[3.0, 4.0]])
+        hits = embedding_cache.get_many(MODEL, ["text"])
+        step = 4.0 / 127.0
+        assert np.allclose(hits[0], [3.0, 4.0], atol=step * 0.51)
+
+
+class TestMisses:
+    """Test cases for cache misses"""
+
+    def test_unknown_texts_are_missing(self):
+        assert embedding_cache.get_many(MODEL, ["never stored"]) == {}
+
+    def test_partial_hits_keep_positions(self):
+        embedding_cache.put_many(MODEL, [TEXTS[0]], [VECTORS[0]])
+        hits = embedding_cache.get_many(MODEL, ["unknown", TEXTS[0]])
+        assert set(hits) == {1}
+
+    def test_model_scopes_entries(self):
+        embedding_cache.put_many("model_a", TEXTS, VECTORS)
+        assert embedding_cache.get_many("model_b", TEXTS) == {}
+
+    def test_empty_texts(self):
+        assert embedding_cache.get_many(MODEL, []) == {}
+        embedding_cache.put_many(MODEL, [], [])  # Should not raise
+
+
+class TestDisabled:
+    """Test cases for the kill switch"""
+
+    def test_disabled_cache_stores_and_serves_nothing(self, monkeypatch):
+        monkeypatch.setenv("EMBEDDING_CACHE_DISABLED", "1")
+        embedding_cache.put_many(MODEL, TEXTS, VECTORS)
+        assert embedding_cache.get_many(MODEL, TEXTS) == {}
@@ -17,44 +17,21 @@ from services.embedding_service import (
 from models.cocktail import Cocktail
 from models.ingredient import Ingredient
 
-dimensions: int = int(os.getenv('EMBEDDING_DIMENSION'))
-logger.info(f"Embedding dimension from environment: {dimensions}")
-
-@pytest.fixture
-def sample_cocktails():
-    """Fixture to provide a small sample of cocktails for testing."""
-    logger.info("Loading sample cocktails for testing...")
-    return create_cocktails()[:4]
-
-@pytest.fixture
-def sample_ingredients():
-    """Fixture to provide sample ingredients for testing."""
-    return [
-        Ingredient(
-            id=1,
-            name="Vodka",
-            description="A clear distilled alcoholic beverage.",
-            alcohol=True,
-            type="Spirit",
-            image_url="https://example.com/vodka.png"
-        ),
-        Ingredient(
-            id=2,
-            name="Lime Juice",
-            description="Juice squeezed from fresh limes.",
-            alcohol=False,
-            type="Mixer",
-            image_url="https://example.com/lime_juice.png"
-        ),
-        Ingredient(
-            id=3,
-            name="Simple Syrup",
-            description="A sweetener made by dissolving sugar in water.",
-            alcohol=False,
-            type="Sweetener",
-            image_url="https://example.com/simple_syrup.png"
-        ),
-    ]
+# sample_cocktails and sample_ingredients are session-scoped fixtures in
+# conftest.py, so the cocktail data is parsed once per test run
+
+@pytest.fixture(scope="session")
+def embedding_dimension() -> int:
+    """Reads EMBEDDING_DIMENSION once per session, skipping if it is not set.
+
+    Reading it inside a fixture (rather than at import time) keeps pytest
+    collection from crashing in environments without the live-Ollama config.
+    """
+    dimensions = os.getenv('EMBEDDING_DIMENSION')
+    if not dimensions:
+        pytest.skip("EMBEDDING_DIMENSION environment variable is not set")
+    logger.info("Embedding dimension from environment: %s", dimensions)
+    return int(dimensions)
 
 def test_create_embeddings(sample_cocktails):
     """Tests the creation of cocktail embeddings."""
@@ -70,17 +47,17 @@ def test_create_embeddings(sample_cocktails):
         assert isinstance(embedding, (list, tuple))
         assert len(embedding) > 0
 
-@pytest.mark.parametrize("query,expected_length", [
-    ("A refreshing cocktail with lime and mint", dimensions),  
-    ("Strong whiskey drink", dimensions),
-    ("Sweet fruity cocktail", dimensions),
+@pytest.mark.parametrize("query", [
+    "A refreshing cocktail with lime and mint",
+    "Strong whiskey drink",
+    "Sweet fruity cocktail",
 ])
-def test_embed_query(query, expected_length):
+def test_embed_query(query, embedding_dimension):
     """Tests embedding generation for queries."""
     embedding = embed_query(query=query)
-    
+
     assert isinstance(embedding, (list, tuple))
-    assert len(embedding) == expected_length
+    assert len(embedding) == embedding_dimension
     # Check that embedding contains numeric values
     assert all(isinstance(x, (int, float)) for x in embedding[:10])
 
@@ -137,9 +114,25 @@ def test_create_embedding_ollama_exception(mock_embed):
     with pytest.raises(Exception):
         _create_embedding("test_model", "test input")
 
+def _failing_async_client():
+    """Async client stub whose embed always fails, forcing the per-item fallback.
+
+    The batched path would otherwise serve these tests against a running
+    Ollama and the _create_embedding mocks would never be consulted.
+    """
+    client = Mock()
+
+    async def _fail(*args, **kwargs):
+        raise Exception("batch embedding unavailable")
+
+    client.embed = _fail
+    return client
+
+@patch('services.embedding_service._make_async_client')
 @patch('services.embedding_service._create_embedding')
-def test_create_cocktail_embeddings_partial_failure(mock_create_embedding, sample_cocktails):
+def test_create_cocktail_embeddings_partial_failure(mock_create_embedding, mock_make_client, sample_cocktails):
     """Tests that cocktail embedding creation continues when some cocktails fail."""
+    mock_make_client.return_value = _failing_async_client()
     # Mock first cocktail to fail, others succeed
     mock_create_embedding.side_effect = [
         Exception("Failed"),
@@ -147,40 +140,46 @@ def test_create_cocktail_embeddings_partial_failure(mock_create_embedding, sampl
         [4.0, 5.0, 6.0],
         [7.0, 8.0, 9.0]
     ]
-    
+
     embedding_map = create_cocktail_embeddings(sample_cocktails)
-    
+
     # Should have 3 embeddings (one failed)
     assert len(embedding_map) == 3
     assert sample_cocktails[0].id not in embedding_map
 
+@patch('services.embedding_service._make_async_client')
 @patch('services.embedding_service._create_embedding')
-def test_create_cocktail_embeddings_all_fail(mock_create_embedding, sample_cocktails):
+def test_create_cocktail_embeddings_all_fail(mock_create_embedding, mock_make_client, sample_cocktails):
     """Tests error handling when all cocktail embeddings fail."""
+    mock_make_client.return_value = _failing_async_client()
     mock_create_embedding.side_effect = Exception("All failed")
-    
+
     with pytest.raises(RuntimeError, match="Failed to create any cocktail embeddings"):
         create_cocktail_embeddings(sample_cocktails)
 
+@patch('services.embedding_service._make_async_client')
 @patch('services.embedding_service._create_embedding')
-def test_create_ingredient_embeddings_partial_failure(mock_create_embedding, sample_ingredients):
+def test_create_ingredient_embeddings_partial_failure(mock_create_embedding, mock_make_client, sample_ingredients):
     """Tests that ingredient embedding creation continues when some ingredients fail."""
+    mock_make_client.return_value = _failing_async_client()
     mock_create_embedding.side_effect = [
         Exception("Failed"),
         [1.0, 2.0, 3.0],
         [4.0, 5.0, 6.0]
     ]
-    
+
     embedding_map = create_ingredient_embeddings(sample_ingredients)
-    
+
     assert len(embedding_map) == 2
     assert sample_ingredients[0].id not in embedding_map
 
+@patch('services.embedding_service._make_async_client')
 @patch('services.embedding_service._create_embedding')
-def test_create_ingredient_embeddings_all_fail(mock_create_embedding, sample_ingredients):
+def test_create_ingredient_embeddings_all_fail(mock_create_embedding, mock_make_client, sample_ingredients):
     """Tests error handling when all ingredient embeddings fail."""
+    mock_make_client.return_value = _failing_async_client()
     mock_create_embedding.side_effect = Exception("All failed")
-    
+
     with pytest.raises(RuntimeError, match="Failed to create any ingredient embeddings"):
         create_ingredient_embeddings(sample_ingredients)
 
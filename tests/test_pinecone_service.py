@@ -1,14 +1,17 @@
 import pytest
 import sys
 import os
+from dataclasses import dataclass, field
+from typing import Optional
 from unittest.mock import Mock, patch, MagicMock
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from services.pinecone_service import (
-    upsert_cocktail_embeddings, 
+    upsert_cocktail_embeddings,
     upsert_ingredient_embeddings,
-    clear_vectorspace, 
+    clear_vectorspace,
     query_cocktails,
+    query_cocktails_batch,
     get_num_vectors,
     PineconeError,
     _create_cocktail_vectors_to_upsert,
@@ -21,6 +24,31 @@ from services.pinecone_service import (
 )
 from models.cocktail import Cocktail
 from models.ingredient import Ingredient
+from services import semantic_cache
+
+
+# Plain slotted stubs instead of Mock(...): Mock builds attribute-spec
+# machinery per instance, which dominates runtime when tests loop over items
+@dataclass(slots=True)
+class _CocktailStub:
+    id: int
+    name: str = ""
+    tags: list = field(default_factory=list)
+    instructions: str = ""
+    image_url: str = ""
+    ingredients: list = field(default_factory=list)
+    vector_metadata: Optional[dict] = None
+
+
+@dataclass(slots=True)
+class _IngredientStub:
+    id: int
+    name: str = ""
+    description: str = ""
+    alcohol: bool = False
+    type: str = ""
+    image_url: str = ""
+    vector_metadata: Optional[dict] = None
 
 
 class TestPineconeService:
@@ -28,7 +56,7 @@ class TestPineconeService:
     @patch('services.pinecone_service.index')
     def test_upsert_cocktail_embeddings_success(self, mock_index):
         """Test successful cocktail embedding upsert."""
-        cocktails = [Mock(id=1, name="Mojito", tags=["refreshing"], instructions="Mix", image_url="url", ingredients=["mint"])]
+        cocktails = [_CocktailStub(id=1, name="Mojito", tags=["refreshing"], instructions="Mix", image_url="url", ingredients=["mint"])]
         embeddings = {1: [0.1, 0.2, 0.3]}
         
         upsert_cocktail_embeddings(cocktails, embeddings)
@@ -41,19 +69,50 @@ class TestPineconeService:
 
     def test_upsert_cocktail_embeddings_empty_embeddings(self):
         """Test upsert with empty embeddings dict."""
-        cocktails = [Mock(id=1)]
+        cocktails = [_CocktailStub(id=1)]
         upsert_cocktail_embeddings(cocktails, {})
         # Should not raise exception
 
     @patch('services.pinecone_service.index')
     def test_upsert_ingredient_embeddings_success(self, mock_index):
         """Test successful ingredient embedding upsert."""
-        ingredients = [Mock(id=1, name="Vodka", description="Spirit", alcohol=True, type="Spirit", image_url="url")]
+        ingredients = [_IngredientStub(id=1, name="Vodka", description="Spirit", alcohol=True, type="Spirit", image_url="url")]
         embeddings = {1: [0.1, 0.2, 0.3]}
         
         upsert_ingredient_embeddings(ingredients, embeddings)
         mock_index.upsert.assert_called_once()
 
+    @patch('services.pinecone_service.index')
+    def test_upsert_waits_on_grpc_futures(self, mock_index):
+        """Test that gRPC futures exposing only result() are awaited cleanly."""
+
+        class _GrpcFutureStub:
+            # Slots keep the stub free of a .get attribute, matching
+            # PineconeGrpcFuture's concurrent.futures interface
+            __slots__ = ('resolved',)
+
+            def __init__(self):
+                self.resolved = False
+
+            def result(self):
+                self.resolved = True
+                return {"upserted_count": 1}
+
+        futures = []
+
+        def _grpc_upsert(vectors, async_req):
+            future = _GrpcFutureStub()
+            futures.append(future)
+            return future
+
+        mock_index.upsert.side_effect = _grpc_upsert
+        cocktails = [_CocktailStub(id=1, name="Mojito")]
+
+        upsert_cocktail_embeddings(cocktails, {1: [0.1, 0.2, 0.3]})
+
+        assert futures
+        assert all(future.resolved for future in futures)
+
     @patch('services.pinecone_service.index')
     def test_clear_vectorspace_success(self, mock_index):
         """Test successful vector space clearing."""
@@ -119,17 +178,119 @@ class TestPineconeService:
         with pytest.raises(PineconeError):
             get_num_vectors()
 
+    @patch('services.pinecone_service.index')
+    def test_repeated_query_served_from_cache(self, mock_index):
+        """Test that an identical query vector skips the second index round-trip."""
+        mock_index.query.return_value = {"matches": []}
+
+        first = query_cocktails(5, [0.1, 0.2])
+        second = query_cocktails(5, [0.1, 0.2])
+
+        assert first is second
+        assert mock_index.query.call_count == 1
+
+    @patch('services.pinecone_service.index')
+    def test_query_cache_scoped_by_top_k(self, mock_index):
+        """Test that the same vector with a different top_k is re-queried."""
+        mock_index.query.return_value = {"matches": []}
+
+        query_cocktails(5, [0.1, 0.2])
+        query_cocktails(6, [0.1, 0.2])
+
+        assert mock_index.query.call_count == 2
+
+    @patch('services.pinecone_service.index')
+    def test_expired_query_cache_entry_is_requeried(self, mock_index, monkeypatch):
+        """Test that entries past the TTL do not serve stale results."""
+        import services.pinecone_service as pinecone_service
+        monkeypatch.setattr(pinecone_service, "QUERY_CACHE_TTL_SECONDS", -1.0)
+        mock_index.query.return_value = {"matches": []}
+
+        query_cocktails(5, [0.1, 0.2])
+        query_cocktails(5, [0.1, 0.2])
+
+        assert mock_index.query.call_count == 2
+
+    @patch('services.pinecone_service.index')
+    def test_query_cache_evicts_least_recently_used(self, mock_index, monkeypatch):
+        """Test that the cache stays within its entry cap."""
+        import services.pinecone_service as pinecone_service
+        monkeypatch.setattr(pinecone_service, "QUERY_CACHE_MAX_ENTRIES", 1)
+        mock_index.query.return_value = {"matches": []}
+
+        query_cocktails(5, [1.0, 0.0])
+        query_cocktails(5, [0.0, 1.0])  # Evicts the first vector
+        query_cocktails(5, [1.0, 0.0])
+
+        assert mock_index.query.call_count == 3
+
+    @patch('services.pinecone_service.index')
+    def test_query_cache_kill_switch(self, mock_index, monkeypatch):
+        """Test that the cache can be disabled via environment variable."""
+        monkeypatch.setenv("PINECONE_QUERY_CACHE_DISABLED", "1")
+        mock_index.query.return_value = {"matches": []}
+
+        query_cocktails(5, [0.1, 0.2])
+        query_cocktails(5, [0.1, 0.2])
+
+        assert mock_index.query.call_count == 2
+
+    @patch('services.pinecone_service.index')
+    def test_clear_vectorspace_invalidates_caches(self, mock_index):
+        """Test that clearing the index drops cached results, stats and the semantic tier."""
+        mock_index.query.return_value = {"matches": []}
+        mock_index.describe_index_stats.return_value = {"total_vector_count": 10}
+        query_cocktails(5, [0.1, 0.2])
+        assert get_num_vectors() == 10
+        semantic_cache.put("minty cocktail", 5, [1.0, 0.0], [{"id": "cocktail_1"}])
+
+        mock_index.describe_index_stats.return_value = {"total_vector_count": 0}
+        clear_vectorspace()
+
+        query_cocktails(5, [0.1, 0.2])
+        assert mock_index.query.call_count == 2
+        assert get_num_vectors() == 0
+        assert semantic_cache.get_exact("minty cocktail", 5) is None
+        assert semantic_cache.get_semantic("minty drink", 5, [1.0, 0.0]) is None
+
+    @patch('services.pinecone_service.index')
+    def test_upsert_invalidates_query_cache(self, mock_index):
+        """Test that a successful upsert drops cached query results."""
+        mock_index.query.return_value = {"matches": []}
+        query_cocktails(5, [0.1, 0.2])
+
+        cocktails = [_CocktailStub(id=1, name="Mojito")]
+        upsert_cocktail_embeddings(cocktails, {1: [0.1, 0.2, 0.3]})
+
+        query_cocktails(5, [0.1, 0.2])
+        assert mock_index.query.call_count == 2
+
+    @patch('services.pinecone_service.index')
+    def test_query_cocktails_batch_preserves_input_order(self, mock_index):
+        """Test that batch query results line up with the input vectors."""
+        mock_index.query.side_effect = lambda top_k, include_metadata, vector: {"vector": vector}
+        vectors = [[1.0, 0.0], [0.0, 1.0], [0.5, 0.5]]
+
+        results = query_cocktails_batch(3, vectors)
+
+        assert [result["vector"] for result in results] == vectors
+        assert mock_index.query.call_count == 3
+
+    def test_query_cocktails_batch_empty_vectors(self):
+        """Test batch query with no vectors."""
+        assert query_cocktails_batch(5, []) == []
+
+    @patch('services.pinecone_service.index')
+    def test_query_cocktails_batch_failure(self, mock_index):
+        """Test that a failing query surfaces as PineconeError."""
+        mock_index.query.side_effect = Exception("Connection error")
+
+        with pytest.raises(PineconeError):
+            query_cocktails_batch(5, [[0.1, 0.2]])
+
     def test_create_cocktail_vectors_to_upsert(self):
         """Test cocktail vector creation."""
-        cocktail_mock = Mock()
-        cocktail_mock.id = 1
-        cocktail_mock.name = "Mojito"
-        cocktail_mock.tags = ["fresh"]
-        cocktail_mock.instructions = "Mix"
-        cocktail_mock.image_url = "url"
-        cocktail_mock.ingredients = ["mint"]
-        
-        cocktails = [cocktail_mock]
+        cocktails = [_CocktailStub(id=1, name="Mojito", tags=["fresh"], instructions="Mix", image_url="url", ingredients=["mint"])]
         embeddings = {1: [0.1, 0.2, 0.3]}
         
         vectors = _create_cocktail_vectors_to_upsert(cocktails, embeddings)
@@ -142,15 +303,7 @@ class TestPineconeService:
 
     def test_create_ingredient_vectors_to_upsert(self):
         """Test ingredient vector creation."""
-        ingredient_mock = Mock()
-        ingredient_mock.id = 1
-        ingredient_mock.name = "Vodka"
-        ingredient_mock.description = "Spirit"
-        ingredient_mock.alcohol = True
-        ingredient_mock.type = "Spirit"
-        ingredient_mock.image_url = "url"
-        
-        ingredients = [ingredient_mock]
+        ingredients = [_IngredientStub(id=1, name="Vodka", description="Spirit", alcohol=True, type="Spirit", image_url="url")]
         embeddings = {1: [0.1, 0.2, 0.3]}
         
         vectors = _create_ingredient_vectors_to_upsert(ingredients, embeddings)
@@ -181,29 +334,38 @@ class TestPineconeService:
         assert _is_valid_ingredient(invalid_ingredient_no_id) == False
         assert _is_valid_ingredient(None) == False
 
-    def test_safe_string(self):
+    @pytest.mark.parametrize("value,expected", [
+        (None, ""),
+        ("test", "test"),
+        (123, "123"),
+        (True, "True"),
+    ])
+    def test_safe_string(self, value, expected):
         """Test safe string conversion."""
-        assert _safe_string(None) == ""
-        assert _safe_string("test") == "test"
-        assert _safe_string(123) == "123"
-        assert _safe_string(True) == "True"
+        assert _safe_string(value) == expected
 
-    def test_safe_list(self):
+    @pytest.mark.parametrize("value,expected", [
+        (None, []),
+        ([1, 2, 3], [1, 2, 3]),
+        ((1, 2), [1, 2]),
+        ({1, 2}, [1, 2]),
+        ("test", ["test"]),
+    ])
+    def test_safe_list(self, value, expected):
         """Test safe list conversion."""
-        assert _safe_list(None) == []
-        assert _safe_list([1, 2, 3]) == [1, 2, 3]
-        assert _safe_list((1, 2)) == [1, 2]
-        assert _safe_list({1, 2}) == [1, 2]
-        assert _safe_list("test") == ["test"]
+        assert _safe_list(value) == expected
 
-    def test_safe_bool(self):
+    @pytest.mark.parametrize("value,expected", [
+        (None, False),
+        (True, True),
+        (False, False),
+        ("true", True),
+        ("false", False),
+        ("1", True),
+        ("0", False),
+        (1, True),
+        (0, False),
+    ])
+    def test_safe_bool(self, value, expected):
         """Test safe boolean conversion."""
-        assert _safe_bool(None) == False
-        assert _safe_bool(True) == True
-        assert _safe_bool(False) == False
-        assert _safe_bool("true") == True
-        assert _safe_bool("false") == False
-        assert _safe_bool("1") == True
-        assert _safe_bool("0") == False
-        assert _safe_bool(1) == True
-        assert _safe_bool(0) == False
\ No newline at end of file
+        assert _safe_bool(value) == expected
\ No newline at end of file
@@ -1,4 +1,6 @@
 import pytest
+from dataclasses import dataclass
+from typing import Any
 from unittest.mock import patch, MagicMock
 
 import sys
@@ -19,21 +21,31 @@ from services.rag_service import (
 )
 
 
+# Slotted fakes instead of MagicMock: attribute reads on these are C-level
+# slot lookups rather than MagicMock.__getattr__ calls, which dominate
+# runtime when tests build many matches
+@dataclass(frozen=True, slots=True)
+class _FakeMatch:
+    id: Any
+    score: Any
+    metadata: Any = None
+
+
+@dataclass(frozen=True, slots=True)
+class _FakeResults:
+    matches: Any = None
+
+
 class TestRunCocktailRAG:
     """Test cases for run_cocktail_rag function"""
     
     def test_successful_rag_query(self):
         """Test successful RAG query execution"""
         mock_embedding = [0.1, 0.2, 0.3]
-        mock_results = MagicMock()
-        mock_results.matches = [
-            MagicMock(
-                id="cocktail_1",
-                score=0.95,
-                metadata={"name": "Mojito", "type": "cocktail"}
-            )
-        ]
-        
+        mock_results = _FakeResults(matches=[
+            _FakeMatch(id="cocktail_1", score=0.95, metadata={"name": "Mojito", "type": "cocktail"})
+        ])
+
         with patch('services.rag_service.embed_query', return_value=mock_embedding):
             with patch('services.rag_service.query_cocktails', return_value=mock_results):
                 result = run_cocktail_rag("refreshing cocktail", top_k=5)
@@ -146,8 +158,7 @@ class TestExtractMatches:
     
     def test_extract_matches_from_object_with_matches_attribute(self):
         """Test extracting matches from object with matches attribute"""
-        mock_results = MagicMock()
-        mock_results.matches = ["match1", "match2"]
+        mock_results = _FakeResults(matches=["match1", "match2"])
         result = _extract_matches(mock_results)
         assert result == ["match1", "match2"]
     
@@ -159,15 +170,13 @@ class TestExtractMatches:
     
     def test_extract_matches_empty_list(self):
         """Test extracting empty matches list"""
-        mock_results = MagicMock()
-        mock_results.matches = []
+        mock_results = _FakeResults(matches=[])
         result = _extract_matches(mock_results)
         assert result == []
     
     def test_extract_matches_none_matches(self):
         """Test extracting None matches"""
-        mock_results = MagicMock()
-        mock_results.matches = None
+        mock_results = _FakeResults(matches=None)
         result = _extract_matches(mock_results)
         assert result == []
     
@@ -182,11 +191,8 @@ class TestProcessSingleMatch:
     
     def test_process_match_object(self):
         """Test processing match object with attributes"""
-        mock_match = MagicMock()
-        mock_match.id = "cocktail_1"
-        mock_match.score = 0.95
-        mock_match.metadata = {"name": "Mojito"}
-        
+        mock_match = _FakeMatch(id="cocktail_1", score=0.95, metadata={"name": "Mojito"})
+
         result = _process_single_match(mock_match)
         assert result['id'] == "cocktail_1"
         assert result['score'] == 0.95
@@ -207,11 +213,8 @@ class TestProcessSingleMatch:
     
     def test_process_match_missing_fields(self):
         """Test processing match with missing fields"""
-        mock_match = MagicMock()
-        mock_match.id = None
-        mock_match.score = None
-        mock_match.metadata = None
-        
+        mock_match = _FakeMatch(id=None, score=None, metadata=None)
+
         result = _process_single_match(mock_match)
         assert result['id'] == ""
         assert result['score'] == 0.0
@@ -300,40 +303,29 @@ class TestProcessQueryResults:
     
     def test_process_valid_results(self):
         """Test processing valid query results"""
-        mock_results = MagicMock()
-        mock_match = MagicMock()
-        mock_match.id = "cocktail_1"
-        mock_match.score = 0.95
-        mock_match.metadata = {"name": "Mojito"}
-        mock_results.matches = [mock_match]
-        
+        mock_match = _FakeMatch(id="cocktail_1", score=0.95, metadata={"name": "Mojito"})
+        mock_results = _FakeResults(matches=[mock_match])
+
         result = _process_query_results(mock_results)
         assert len(result) == 1
         assert result[0]['id'] == "cocktail_1"
     
     def test_process_empty_results(self):
         """Test processing empty results"""
-        mock_results = MagicMock()
-        mock_results.matches = []
-        
+        mock_results = _FakeResults(matches=[])
+
         result = _process_query_results(mock_results)
         assert result == []
     
     def test_process_results_with_invalid_match(self):
         """Test processing results with one invalid match"""
-        mock_results = MagicMock()
-        valid_match = MagicMock()
-        valid_match.id = "cocktail_1"
-        valid_match.score = 0.95
-        valid_match.metadata = {"name": "Mojito"}
-        
+        valid_match = _FakeMatch(id="cocktail_1", score=0.95, metadata={"name": "Mojito"})
+
         # Create an invalid match that will cause an exception
-        invalid_match = MagicMock()
-        invalid_match.id = None
-        invalid_match.score = "invalid_score"  # This will cause an error in float conversion
-        
-        mock_results.matches = [valid_match, invalid_match]
-        
+        invalid_match = _FakeMatch(id=None, score="invalid_score")  # This will cause an error in float conversion
+
+        mock_results = _FakeResults(matches=[valid_match, invalid_match])
+
         # Mock _process_single_match to raise exception for invalid match
         with patch('services.rag_service._process_single_match') as mock_process:
             mock_process.side_effect = [
@@ -350,15 +342,10 @@ class TestProcessQueryResults:
 def test_run_cocktail_rag_integration():
     """Integration test for run_cocktail_rag"""
     mock_embedding = [0.1, 0.2, 0.3]
-    mock_results = MagicMock()
-    mock_results.matches = [
-        MagicMock(
-            id="cocktail_1",
-            score=0.95,
-            metadata={"name": "Mojito", "type": "cocktail"}
-        )
-    ]
-    
+    mock_results = _FakeResults(matches=[
+        _FakeMatch(id="cocktail_1", score=0.95, metadata={"name": "Mojito", "type": "cocktail"})
+    ])
+
     with patch('services.rag_service.embed_query', return_value=mock_embedding):
         with patch('services.rag_service.query_cocktails', return_value=mock_results):
             result = run_cocktail_rag("refreshing mint cocktail")
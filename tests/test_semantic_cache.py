@@ -0,0 +1,199 @@
+import sys
+import os
+import time
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import semantic_cache
+
+
+PAYLOAD = [{"id": "cocktail_1", "score": 0.95, "metadata": {"name": "Mojito"}}]
+OTHER_PAYLOAD = [{"id": "cocktail_2", "score": 0.87, "metadata": {"name": "Margarita"}}]
+
+# The autouse conftest fixture clears the cache between tests, so every test
+# starts from an empty cache with zeroed counters.
+
+
+class TestNormalizeQuery:
+    """Test cases for normalize_query"""
+
+    @pytest.mark.parametrize("raw,expected", [
+        ("Minty Cocktail!", "minty cocktail"),
+        ("  sweet   and\tsour  ", "sweet and sour"),
+        ("RUM, lime & mint.", "rum lime mint"),
+        ("", ""),
+    ])
+    def test_normalize_query(self, raw, expected):
+        assert semantic_cache.normalize_query(raw) == expected
+
+
+class TestExactHit:
+    """Test cases for get_exact"""
+
+    def test_exact_hit_ignores_punctuation_and_case(self):
+        semantic_cache.put("Minty Cocktail!", 5, [1.0, 0.0], PAYLOAD)
+        assert semantic_cache.get_exact("minty cocktail", 5) == PAYLOAD
+
+    def test_exact_miss_on_unknown_query(self):
+        assert semantic_cache.get_exact("never cached", 5) is None
+
+    def test_exact_miss_on_different_top_k(self):
+        semantic_cache.put("minty cocktail", 5, [1.0, 0.0], PAYLOAD)
+        assert semantic_cache.get_exact("minty cocktail", 3) is None
+
+    def test_hit_returns_a_copy(self):
+        semantic_cache.put("minty cocktail", 5, [1.0, 0.0], PAYLOAD)
+        result = semantic_cache.get_exact("minty cocktail", 5)
+        result.append({"id": "intruder"})
+        assert semantic_cache.get_exact("minty cocktail", 5) == PAYLOAD
+
+    def test_put_refreshes_existing_key(self):
+        semantic_cache.put("minty cocktail", 5, [1.0, 0.0], PAYLOAD)
+        semantic_cache.put("minty cocktail", 5, [1.0, 0.0], OTHER_PAYLOAD)
+        assert semantic_cache.get_exact("minty cocktail", 5) == OTHER_PAYLOAD
+
+    def test_hit_and_miss_counters(self):
+        semantic_cache.put("minty cocktail", 5, [1.0, 0.0], PAYLOAD)
+        semantic_cache.get_exact("minty cocktail", 5)
+        semantic_cache.get_exact("unknown", 5)
+        assert semantic_cache.hits == 1
+        assert semantic_cache.misses == 1
+
+
+class TestSemanticHit:
+    """Test cases for get_semantic"""
+
+    def test_hit_for_same_embedding_different_text(self):
+        semantic_cache.put("refreshing mint drink", 5, [0.6, 0.8], PAYLOAD)
+        result = semantic_cache.get_semantic("a refreshing mint beverage", 5, [0.6, 0.8])
+        assert result == PAYLOAD
+
+    def test_hit_is_scale_invariant(self):
+        # Cached rows are L2-normalized, so magnitude must not matter
+        semantic_cache.put("refreshing mint drink", 5, [0.6, 0.8], PAYLOAD)
+        assert semantic_cache.get_semantic("mint beverage", 5, [6.0, 8.0]) == PAYLOAD
+
+    def test_miss_below_threshold(self):
+        semantic_cache.put("refreshing mint drink", 5, [1.0, 0.0], PAYLOAD)
+        assert semantic_cache.get_semantic("strong whiskey", 5, [0.0, 1.0]) is None
+
+    def test_miss_on_different_top_k(self):
+        semantic_cache.put("refreshing mint drink", 5, [0.6, 0.8], PAYLOAD)
+        assert semantic_cache.get_semantic("mint beverage", 3, [0.6, 0.8]) is None
+
+    def test_miss_on_empty_cache(self):
+        assert semantic_cache.get_semantic("anything", 5, [1.0, 0.0]) is None
+
+    def test_zero_vector_is_never_cached(self):
+        semantic_cache.put("zeroes", 5, [0.0, 0.0], PAYLOAD)
+        assert semantic_cache.get_exact("zeroes", 5) is None
+
+
+class TestLSHRecall:
+    """Test cases for the LSH prefilter's recall near the hit threshold"""
+
+    @staticmethod
+    def _perturbed(rng, base, cosine):
+        # Rotate the unit vector towards orthogonal noise so the result has
+        # exactly the requested cosine similarity with base
+        noise = rng.standard_normal(base.shape[0]).astype(np.float32)
+        noise -= (noise @ base) * base
+        noise /= np.linalg.norm(noise)
+        return cosine * base + np.sqrt(1.0 - cosine ** 2) * noise
+
+    def test_near_duplicates_hit_through_prefilter(self):
+        # Realistic embedding dimension, similarity just above the 0.95
+        # threshold — the regime where an exact-bucket prefilter loses
+        # nearly every hit
+        rng = np.random.default_rng(11)
+        dimension = 768
+        trials = 100
+        hits = 0
+        for trial in range(trials):
+            semantic_cache.clear()
+            base = rng.standard_normal(dimension).astype(np.float32)
+            base /= np.linalg.norm(base)
+            probe = self._perturbed(rng, base, cosine=0.96)
+            semantic_cache.put(f"query {trial}", 5, base.tolist(), PAYLOAD)
+            # The prefilter must actually be in play for this to mean anything
+            assert semantic_cache._projections is not None
+            if semantic_cache.get_semantic(f"paraphrase {trial}", 5, probe.tolist()) == PAYLOAD:
+                hits += 1
+        assert hits >= trials * 0.95
+
+    def test_prefilter_matches_full_scan(self, monkeypatch):
+        # The same lookups answered with the prefilter disabled must agree
+        rng = np.random.default_rng(12)
+        dimension = 768
+        base = rng.standard_normal(dimension).astype(np.float32)
+        base /= np.linalg.norm(base)
+        probe = self._perturbed(rng, base, cosine=0.97)
+        semantic_cache.put("cached query", 5, base.tolist(), PAYLOAD)
+
+        with_prefilter = semantic_cache.get_semantic("probe", 5, probe.tolist())
+        monkeypatch.setenv("RAG_LSH_TABLES", "0")
+        semantic_cache.clear()
+        semantic_cache.put("cached query", 5, base.tolist(), PAYLOAD)
+        full_scan = semantic_cache.get_semantic("probe", 5, probe.tolist())
+        assert with_prefilter == full_scan == PAYLOAD
+
+
+class TestTTL:
+    """Test cases for entry expiry"""
+
+    def test_expired_entry_is_a_miss(self, monkeypatch):
+        semantic_cache.put("minty cocktail", 5, [1.0, 0.0], PAYLOAD)
+        monkeypatch.setenv("SEMANTIC_CACHE_TTL_SECONDS", "-1")
+        assert semantic_cache.get_exact("minty cocktail", 5) is None
+        assert semantic_cache.get_semantic("minty cocktail", 5, [1.0, 0.0]) is None
+
+    def test_fresh_entry_is_served(self, monkeypatch):
+        monkeypatch.setenv("SEMANTIC_CACHE_TTL_SECONDS", "3600")
+        semantic_cache.put("minty cocktail", 5, [1.0, 0.0], PAYLOAD)
+        assert semantic_cache.get_exact("minty cocktail", 5) == PAYLOAD
+
+
+class TestEviction:
+    """Test cases for LRU eviction"""
+
+    def test_least_recently_used_entry_is_evicted(self, monkeypatch):
+        monkeypatch.setenv("SEMANTIC_CACHE_MAX_ENTRIES", "2")
+        semantic_cache.put("first", 5, [1.0, 0.0, 0.0], PAYLOAD)
+        time.sleep(0.002)
+        semantic_cache.put("second", 5, [0.0, 1.0, 0.0], OTHER_PAYLOAD)
+        time.sleep(0.002)
+        # Touch "first" so "second" becomes the LRU entry
+        semantic_cache.get_exact("first", 5)
+        time.sleep(0.002)
+        semantic_cache.put("third", 5, [0.0, 0.0, 1.0], PAYLOAD)
+
+        assert semantic_cache.get_exact("second", 5) is None
+        assert semantic_cache.get_exact("first", 5) == PAYLOAD
+        assert semantic_cache.get_exact("third", 5) == PAYLOAD
+
+    def test_semantic_lookup_survives_eviction_renumbering(self, monkeypatch):
+        monkeypatch.setenv("SEMANTIC_CACHE_MAX_ENTRIES", "2")
+        semantic_cache.put("first", 5, [1.0, 0.0, 0.0], PAYLOAD)
+        time.sleep(0.002)
+        semantic_cache.put("second", 5, [0.0, 1.0, 0.0], OTHER_PAYLOAD)
+        time.sleep(0.002)
+        semantic_cache.put("third", 5, [0.0, 0.0, 1.0], PAYLOAD)
+
+        # The surviving rows must still score against the right embeddings
+        assert semantic_cache.get_semantic("2nd query", 5, [0.0, 1.0, 0.0]) == OTHER_PAYLOAD
+        assert semantic_cache.get_semantic("3rd query", 5, [0.0, 0.0, 1.0]) == PAYLOAD
+
+
+class TestDisabled:
+    """Test cases for the kill switch"""
+
+    def test_disabled_cache_never_stores_or_serves(self, monkeypatch):
+        monkeypatch.setenv("SEMANTIC_CACHE_DISABLED", "1")
+        semantic_cache.put("minty cocktail", 5, [1.0, 0.0], PAYLOAD)
+        assert semantic_cache.get_exact("minty cocktail", 5) is None
+        assert semantic_cache.get_semantic("minty cocktail", 5, [1.0, 0.0]) is None
+        assert semantic_cache.hits == 0
+        assert semantic_cache.misses == 0